@@ -0,0 +1,157 @@
+"""
+Cek kesetaraan catalog snapshot (utils/catalog.py) dengan jalur Mongo (product_query_plan)
+untuk GET /products, atas kombinasi filter/sort/halaman acak. Output JSON, exit code 1 jika beda.
+
+    python -m benchmarks.catalog_parity --in-memory
+    python -m benchmarks.catalog_parity --db product-management-bench --seed-first --yes-drop --products 20000
+
+Fase kedua mengubah sebagian produk (update, soft delete, hard delete, create) lalu mengulang
+perbandingan, jadi jalankan terhadap database benchmark, bukan data asli.
+"""
+import argparse
+import json
+import random
+import sys
+from typing import List
+
+SORTS = [None] + [prefix + f for f in ("name", "unit_price", "stock", "created_at") for prefix in ("", "-")]
+NAME_NEEDLES = ["bench", "1", "23", "xyz", "product 1", "renamed", "parity"]
+
+
+def _filters(rng: random.Random, categories: List[str], statuses: List[str]):
+    from router.dto.product import ProductFilters
+
+    min_price = round(rng.uniform(0, 250), 2) if rng.random() < 0.3 else None
+    return ProductFilters(
+        name=rng.choice(NAME_NEEDLES) if rng.random() < 0.2 else None,
+        status=rng.choice(statuses) if rng.random() < 0.5 else None,
+        category=rng.choice(categories) if rng.random() < 0.5 else None,
+        min_price=min_price,
+        max_price=min_price + rng.choice([5, 50, 100]) if min_price is not None and rng.random() < 0.7 else None,
+        min_stock=rng.randint(0, 100) if rng.random() < 0.2 else None,
+        max_stock=rng.randint(100, 500) if rng.random() < 0.1 else None,
+        low_stock_only=rng.random() < 0.2,
+        sort=rng.choice(SORTS),
+    )
+
+
+def _page(page: int, size: int, filters, from_snapshot: bool) -> dict:
+    from router.controller import product_controller
+    from utils.catalog import catalog
+
+    catalog.ready = from_snapshot
+    try:
+        response = product_controller.get_all_products(page=page, size=size, filters=filters)
+    finally:
+        catalog.ready = True
+    return json.loads(response.body)
+
+
+def compare(rng: random.Random, cases: int, categories: List[str], statuses: List[str]) -> dict:
+    mismatches = []
+    for _ in range(cases):
+        filters = _filters(rng, categories, statuses)
+        page, size = rng.randint(1, 5), rng.choice([1, 10, 50, 200])
+        snapshot = _page(page, size, filters, True)
+        mongo = _page(page, size, filters, False)
+        if snapshot != mongo:
+            mismatches.append(
+                {
+                    "filters": {k: v for k, v in vars(filters).items() if v not in (None, False)},
+                    "page": page,
+                    "size": size,
+                    "snapshot": snapshot["pagination_info"],
+                    "mongo": mongo["pagination_info"],
+                    "snapshot_ids": [d["product_id"] for d in snapshot["data"]][:5],
+                    "mongo_ids": [d["product_id"] for d in mongo["data"]][:5],
+                }
+            )
+    return {"cases": cases, "mismatches": len(mismatches), "examples": mismatches[:5]}
+
+
+def mutate(rng: random.Random, count: int, statuses: List[str]) -> None:
+    """Ubah produk lewat Mongo + change event (seperti change stream) dan lewat controller (apply_local)."""
+    from db import mongo_service
+    from router.controller import product_controller
+    from router.dto.product import ProductCreate, ProductUpdate
+    from utils.catalog import catalog
+
+    coll = mongo_service.db["inventory"]
+    docs = list(coll.find({"is_deleted": False}).limit(count))
+    for i, doc in enumerate(docs):
+        kind = i % 5
+        if kind == 0:
+            coll.update_one(
+                {"_id": doc["_id"]},
+                {"$set": {"unit_price": round(rng.uniform(0, 300), 2), "status": rng.choice(statuses), "name": f"Renamed {doc['name']}"}},
+            )
+            catalog.apply_change({"operationType": "update", "fullDocument": coll.find_one({"_id": doc["_id"]})})
+        elif kind == 1:
+            coll.update_one({"_id": doc["_id"]}, {"$set": {"is_deleted": True}})
+            catalog.apply_change({"operationType": "update", "fullDocument": coll.find_one({"_id": doc["_id"]})})
+        elif kind == 2:
+            coll.delete_one({"_id": doc["_id"]})
+            catalog.apply_change({"operationType": "delete", "documentKey": {"_id": doc["_id"]}})
+        elif kind == 3:
+            product_controller.update_product(doc["product_id"], ProductUpdate(stock=rng.randint(0, 20), category="Parity"))
+        else:
+            product_controller.delete_product(doc["product_id"])
+    product_controller.create_products(
+        [
+            ProductCreate(name=f"Parity {i}", category="Parity", description="parity", stock=i, unit_price=9.5 + i, low_stock=5)
+            for i in range(max(1, count // 5))
+        ]
+    )
+
+
+def run(cases: int, mutations: int, seed: int) -> dict:
+    from benchmarks.seed import CATEGORIES, STATUSES
+    from db.indexes import ensure_indexes
+    from utils.catalog import catalog
+
+    ensure_indexes()
+    catalog.load()
+    rng = random.Random(seed)
+    results = {"loaded": compare(rng, cases, CATEGORIES, STATUSES)}
+    if mutations:
+        mutate(rng, mutations, STATUSES)
+        results["after_mutations"] = compare(rng, cases, CATEGORIES + ["Parity"], STATUSES)
+    return {"meta": {"cases": cases, "mutations": mutations, "seed": seed, "products": catalog.stats(False)["products"]}, "results": results}
+
+
+def main() -> None:
+    from benchmarks.seed import add_db_arguments, select_bench_db
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=300, help="random filter/sort/page combinations per phase")
+    parser.add_argument("--mutations", type=int, default=50, help="products changed before the second phase (0 to skip)")
+    parser.add_argument("--products", type=int, default=3_000, help="number of seeded products")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seed-first", action="store_true", help="seed --products before running")
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock")
+    parser.add_argument("--output", help="write JSON results to this file")
+    add_db_arguments(parser)
+    args = parser.parse_args()
+
+    select_bench_db(args)
+    if args.in_memory:
+        from benchmarks.mongo_standin import use_in_memory_mongo
+
+        use_in_memory_mongo()
+    if args.seed_first or args.in_memory:
+        from benchmarks.seed import seed
+
+        seed(args.products, 1, drop=args.yes_drop or args.in_memory)
+
+    report = run(args.cases, args.mutations, args.seed)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    if any(phase["mismatches"] for phase in report["results"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+In-memory stand-in untuk MongoDB (mongomock), hanya untuk smoke run benchmark dalam satu proses.
+Angka latency yang dipakai untuk membandingkan release harus diambil dari mongod lokal.
+"""
+
+
+def use_in_memory_mongo() -> None:
+    try:
+        import mongomock
+    except ImportError as e:
+        raise SystemExit("--in-memory requires mongomock: pip install mongomock") from e
+    from db import mongo_service
+
+    mongo_service.use_client(mongomock.MongoClient())
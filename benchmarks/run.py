@@ -0,0 +1,331 @@
+"""
+Load test / benchmark untuk API, output JSON (p50/p95/p99 dan RPS per skenario).
+
+    # In-process lewat httpx ASGI transport
+    python -m benchmarks.run --mode asgi --db product-management-bench
+
+    # Multi-worker uvicorn yang di-spawn oleh harness
+    python -m benchmarks.run --mode http --workers 4 --db product-management-bench
+
+    # Server yang sudah berjalan (skenario yang menulis butuh --allow-writes)
+    python -m benchmarks.run --mode http --url http://127.0.0.1:8000 --scenarios list_filters get_by_id
+
+Jalankan `python -m benchmarks.seed` lebih dulu (atau pakai --seed-first dengan --products/--users).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.seed import (
+    BENCH_ADMIN_EMAIL,
+    BENCH_PASSWORD,
+    CATEGORIES,
+    STATUSES,
+    add_db_arguments,
+    bench_product_id,
+    bench_user_email,
+    select_bench_db,
+)
+
+PRODUCT_PREFIX = "/product/controller/api/v1"
+LOGIN_PATH = "/auth/controller/api/v1/login"
+# PNG 1x1 transparan
+TINY_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+SORTS = ["name", "-unit_price", "stock", "-created_at", None]
+# Skenario yang menulis ke database (dan disk) server
+WRITE_SCENARIOS = {"bulk_create", "image_upload"}
+
+Scenario = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+class BenchContext:
+    def __init__(self, products: int, users: int, admin_token: str):
+        self.products = products
+        self.users = users
+        self.admin_headers = {"Authorization": f"Bearer {admin_token}"}
+        # URL file yang dibuat image_upload, dihapus setelah run
+        self.uploaded: List[str] = []
+
+
+def _list_with_filters(ctx: BenchContext) -> Scenario:
+    async def run(client: httpx.AsyncClient, rng: random.Random):
+        params = {"page": rng.randint(1, 20), "size": 50}
+        if rng.random() < 0.6:
+            params["category"] = rng.choice(CATEGORIES)
+        if rng.random() < 0.6:
+            params["status"] = rng.choice(STATUSES)
+        if rng.random() < 0.3:
+            low = rng.uniform(0, 250)
+            params["min_price"] = round(low, 2)
+            params["max_price"] = round(low + 100, 2)
+        if rng.random() < 0.2:
+            params["low_stock_only"] = "true"
+        sort = rng.choice(SORTS)
+        if sort:
+            params["sort"] = sort
+        return await client.get(f"{PRODUCT_PREFIX}/products", params=params)
+
+    return run
+
+
+def _get_by_id(ctx: BenchContext) -> Scenario:
+    async def run(client: httpx.AsyncClient, rng: random.Random):
+        product_id = bench_product_id(rng.randrange(ctx.products))
+        return await client.get(f"{PRODUCT_PREFIX}/{product_id}")
+
+    return run
+
+
+def _login_burst(ctx: BenchContext) -> Scenario:
+    async def run(client: httpx.AsyncClient, rng: random.Random):
+        email = bench_user_email(rng.randrange(ctx.users)) if ctx.users else BENCH_ADMIN_EMAIL
+        return await client.post(LOGIN_PATH, data={"username": email, "password": BENCH_PASSWORD})
+
+    return run
+
+
+def _bulk_create(ctx: BenchContext, batch: int = 20) -> Scenario:
+    async def run(client: httpx.AsyncClient, rng: random.Random):
+        payload = [
+            {
+                "name": f"Bench bulk {rng.randrange(10**9)}",
+                "category": rng.choice(CATEGORIES),
+                "description": "Benchmark bulk create",
+                "stock": rng.randint(0, 500),
+                "unit_price": round(rng.uniform(0.5, 500), 2),
+                "low_stock": 10,
+            }
+            for _ in range(batch)
+        ]
+        return await client.post(f"{PRODUCT_PREFIX}/products", json=payload)
+
+    return run
+
+
+def _image_upload(ctx: BenchContext) -> Scenario:
+    async def run(client: httpx.AsyncClient, rng: random.Random):
+        product_id = bench_product_id(rng.randrange(ctx.products))
+        response = await client.post(
+            f"{PRODUCT_PREFIX}/{product_id}/image",
+            files={"file": ("bench.png", TINY_PNG, "image/png")},
+            headers=ctx.admin_headers,
+        )
+        if response.status_code == 200:
+            ctx.uploaded.append(response.json()["image_url"])
+        return response
+
+    return run
+
+
+SCENARIOS: Dict[str, Callable[[BenchContext], Scenario]] = {
+    "list_filters": _list_with_filters,
+    "get_by_id": _get_by_id,
+    "login_burst": _login_burst,
+    "bulk_create": _bulk_create,
+    "image_upload": _image_upload,
+}
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 3)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(worker_id: int):
+        nonlocal remaining, errors
+        rng = random.Random(seed + worker_id)
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await scenario(client, rng)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+    }
+
+
+async def _admin_token(client: httpx.AsyncClient) -> str:
+    response = await client.post(LOGIN_PATH, data={"username": BENCH_ADMIN_EMAIL, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_all(client: httpx.AsyncClient, args: argparse.Namespace) -> dict:
+    ctx = BenchContext(args.products, args.users, await _admin_token(client))
+    results = {}
+    try:
+        for name in args.scenarios:
+            scenario = SCENARIOS[name](ctx)
+            # Warm-up singkat agar koneksi/pool sudah terbentuk sebelum diukur
+            await run_scenario(client, scenario, min(args.requests, 20), min(args.concurrency, 4), args.seed)
+            results[name] = await run_scenario(client, scenario, args.requests, args.concurrency, args.seed)
+    finally:
+        # Server lain (--url) menulis ke disk-nya sendiri; file di sana tidak bisa dihapus dari sini
+        if not args.url:
+            _remove_uploads(ctx.uploaded)
+    return results
+
+
+def _remove_uploads(urls: List[str]) -> None:
+    # Hanya file yang URL-nya dikembalikan ke benchmark; upload lain di static/ tidak disentuh
+    from utils.helper import static_file_path
+
+    base_dir = Path("static") / "products"
+    removed = 0
+    for url in urls:
+        path = static_file_path(url, base_dir)
+        if path is not None and path.is_file():
+            path.unlink()
+            removed += 1
+    if urls:
+        print(f"Removed {removed} uploaded benchmark files from {base_dir}", file=sys.stderr)
+
+
+def _spawn_uvicorn(workers: int, port: int) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--http", "httptools", "--no-access-log",
+    ]
+    return subprocess.Popen(cmd, env=os.environ.copy())
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("Server did not become ready in time")
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    meta = {
+        "mode": args.mode,
+        "workers": args.workers,
+        "products": args.products,
+        "users": args.users,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+    }
+    if args.mode == "asgi":
+        from main import app
+
+        # ASGITransport tidak menjalankan lifespan; controller dimuat di sana
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+                await _wait_ready(client)
+                return {"meta": meta, "results": await run_all(client, args)}
+
+    proc: Optional[subprocess.Popen] = None
+    url = args.url
+    if not url:
+        proc = _spawn_uvicorn(args.workers, args.port)
+        url = f"http://127.0.0.1:{args.port}"
+    try:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+            await _wait_ready(client)
+            return {"meta": meta, "results": await run_all(client, args)}
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["asgi", "http"], default="asgi")
+    parser.add_argument("--url", help="benchmark an already running server instead of spawning uvicorn")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--products", type=int, default=10_000, help="number of seeded products")
+    parser.add_argument("--users", type=int, default=1_000, help="number of seeded users")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seed-first", action="store_true", help="seed --products/--users before running")
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock (asgi mode only)")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--rate-limit", action="store_true", help="keep rate limiting enabled while benchmarking")
+    parser.add_argument("--allow-writes", action="store_true", help="run write scenarios against --url")
+    add_db_arguments(parser)
+    args = parser.parse_args()
+
+    # Diset sebelum settings di-import (juga diwarisi worker uvicorn yang di-spawn)
+    if not args.rate_limit:
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+    # Database server lain (--url) tidak bisa dicek dari sini; skenario tulis harus diminta eksplisit
+    if args.url and WRITE_SCENARIOS & set(args.scenarios) and not args.allow_writes:
+        parser.error(f"{', '.join(sorted(WRITE_SCENARIOS))} write to the server's database; pass --allow-writes")
+    if not args.url or args.seed_first:
+        select_bench_db(args)
+    if args.in_memory:
+        if args.mode != "asgi":
+            parser.error("--in-memory only works with --mode asgi")
+        from benchmarks.mongo_standin import use_in_memory_mongo
+
+        use_in_memory_mongo()
+    if args.seed_first or args.in_memory:
+        from benchmarks.seed import seed
+
+        seed(args.products, args.users, drop=args.yes_drop or args.in_memory)
+
+    report = asyncio.run(main_async(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
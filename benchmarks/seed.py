@@ -0,0 +1,173 @@
+"""
+Seed `inventory` dan `users` dengan data sintetis untuk benchmark.
+
+    python -m benchmarks.seed --db product-management-bench --yes-drop --products 100000 --users 10000
+
+product_id dan email dibuat deterministik sehingga skenario benchmark bisa
+menebak id yang valid tanpa query tambahan. Database default aplikasi (MONGODB_DB tidak
+diubah) ditolak kecuali dipilih eksplisit lewat --db; drop collection hanya dengan --yes-drop.
+"""
+import argparse
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterator
+
+BENCH_NAMESPACE = uuid.UUID("6f1c2a52-7d1e-4c0b-9a43-3f8e2f5b9c10")
+BENCH_PASSWORD = "bench-password"
+BENCH_ADMIN_EMAIL = "bench-admin@example.com"
+CATEGORIES = ["food", "drinks", "snacks", "household", "electronics", "stationery", "toys", "health"]
+STATUSES = ["active", "active", "active", "inactive", "draft"]
+WORDS = ["classic", "mini", "max", "fresh", "eco", "pro", "family", "daily", "super", "lite"]
+
+
+def add_db_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--db", help="benchmark database name (overrides MONGODB_DB)")
+    parser.add_argument("--yes-drop", action="store_true", help="drop inventory/users before seeding")
+
+
+def select_bench_db(args: argparse.Namespace) -> str:
+    """
+    Pilih database benchmark sebelum settings/client dibuat. Benchmark menulis (dan bisa
+    men-drop) inventory/users, jadi database default aplikasi hanya dipakai jika eksplisit via --db.
+    """
+    if args.db:
+        # Lewat env agar worker uvicorn yang di-spawn ikut memakai database yang sama
+        os.environ["MONGODB_DB"] = args.db
+    from settings import Settings, settings
+
+    default_db = Settings.model_fields["mongodb_db"].default
+    if not args.db and not getattr(args, "in_memory", False) and settings.mongodb_db == default_db:
+        raise SystemExit(
+            f"Refusing to benchmark against the application database '{default_db}'. "
+            "Pass --db <name> (e.g. --db product-management-bench)."
+        )
+    return settings.mongodb_db
+
+
+def bench_product_id(i: int) -> str:
+    return str(uuid.uuid5(BENCH_NAMESPACE, f"product-{i}"))
+
+
+def bench_user_email(i: int) -> str:
+    return f"bench-user-{i}@example.com"
+
+
+def generate_products(count: int, seed: int = 42) -> Iterator[dict]:
+    rng = random.Random(seed)
+    base = datetime.now() - timedelta(days=365)
+    for i in range(count):
+        stock = rng.randint(0, 500)
+        low_stock = rng.choice([5, 10, 20, 50])
+        created = base + timedelta(seconds=rng.randint(0, 365 * 86400))
+        yield {
+            "product_id": bench_product_id(i),
+            "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+            "category": rng.choice(CATEGORIES),
+            "description": "Benchmark product",
+            "stock": stock,
+            "unit_price": round(rng.uniform(0.5, 500), 2),
+            "low_stock": low_stock,
+            "is_low_stock": stock <= low_stock,
+            "image_url": None,
+            "status": rng.choice(STATUSES),
+            "created_at": created,
+            "updated_at": created,
+            "is_deleted": False,
+            "deleted_at": None,
+        }
+
+
+def generate_users(count: int, password_hash: str) -> Iterator[dict]:
+    now = datetime.now()
+    yield {
+        "user_id": str(uuid.uuid5(BENCH_NAMESPACE, "admin")),
+        "name": "Bench Admin",
+        "email": BENCH_ADMIN_EMAIL,
+        "phone": None,
+        "status": "active",
+        "roles": ["admin"],
+        "password": password_hash,
+        "created_at": now,
+        "updated_at": now,
+        "is_deleted": False,
+        "deleted_at": None,
+    }
+    for i in range(count):
+        yield {
+            "user_id": str(uuid.uuid5(BENCH_NAMESPACE, f"user-{i}")),
+            "name": f"Bench User {i}",
+            "email": bench_user_email(i),
+            "phone": None,
+            "status": "active",
+            "roles": ["user"],
+            # Hash yang sama untuk semua user: bcrypt per user akan mendominasi waktu seeding
+            "password": password_hash,
+            "created_at": now,
+            "updated_at": now,
+            "is_deleted": False,
+            "deleted_at": None,
+        }
+
+
+def _insert_batched(collection, docs: Iterator[dict], batch_size: int) -> int:
+    total = 0
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            total += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        total += len(batch)
+    return total
+
+
+def seed(products: int, users: int, batch_size: int = 10_000, drop: bool = False) -> dict:
+    from db import mongo_service
+    from db.indexes import ensure_indexes
+    from utils.auth import get_password_hash
+    from utils.inventory_summary import rebuild_summary
+
+    db = mongo_service.db
+    if drop:
+        db["inventory"].drop()
+        db["users"].drop()
+    elif db["inventory"].find_one({}, {"_id": 1}) or db["users"].find_one({}, {"_id": 1}):
+        # product_id/email deterministik: seeding ulang tanpa drop hanya akan bentrok
+        raise SystemExit(f"Database '{mongo_service.db_name}' already has inventory/users; pass --yes-drop to reseed")
+    started = time.perf_counter()
+    inserted_products = _insert_batched(db["inventory"], generate_products(products), batch_size)
+    inserted_users = _insert_batched(db["users"], generate_users(users, get_password_hash(BENCH_PASSWORD)), batch_size)
+    ensure_indexes()
+    db["users"].create_index("email", unique=True)
+    rebuild_summary()
+    return {
+        "products": inserted_products,
+        "users": inserted_users,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock instead of a local mongod")
+    add_db_arguments(parser)
+    args = parser.parse_args()
+    select_bench_db(args)
+    if args.in_memory:
+        from benchmarks.mongo_standin import use_in_memory_mongo
+
+        use_in_memory_mongo()
+    print(seed(args.products, args.users, args.batch_size, drop=args.yes_drop))
+
+
+if __name__ == "__main__":
+    main()
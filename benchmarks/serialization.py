@@ -0,0 +1,114 @@
+"""
+Benchmark serialisasi satu halaman list (default 200 row) tanpa Mongo/HTTP, output JSON.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --rows 200 --iterations 500
+
+Membandingkan jalur response_model bawaan FastAPI (validasi ulang dict -> model lalu
+jsonable_encoder + json.dumps) dengan ListPageEncoder (TypeAdapter validated dan trusted).
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from itertools import islice
+from typing import Callable, Dict, List
+
+from benchmarks.seed import generate_products, generate_users
+
+
+def _product_docs(rows: int) -> List[dict]:
+    docs = []
+    for doc in islice(generate_products(rows), rows):
+        # Bentuk dokumen seperti hasil find_many: tanpa _id, datetime presisi milidetik
+        doc["created_at"] = doc["updated_at"] = doc["created_at"].replace(
+            microsecond=doc["created_at"].microsecond // 1000 * 1000
+        )
+        docs.append(doc)
+    return docs
+
+
+def _user_docs(rows: int) -> List[dict]:
+    return list(islice(generate_users(rows, "$2b$12$hash"), rows))
+
+
+def _fastapi_default(page_model) -> Callable[[dict], bytes]:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+
+    field = create_model_field(name=f"Response_{page_model.__name__}", type_=page_model, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def run(content: dict) -> bytes:
+        # is_coroutine=False seperti handler sync: validasi dijalankan lewat threadpool
+        value = loop.run_until_complete(
+            serialize_response(field=field, response_content=content, is_coroutine=False)
+        )
+        return JSONResponse(value).body
+
+    return run
+
+
+def _time(fn: Callable[[], bytes], iterations: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    return {
+        "mean_us": round(statistics.fmean(samples), 1),
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1], 1),
+    }
+
+
+def run(rows: int, iterations: int) -> dict:
+    from router.dto.product import ProductResponse, ProductsListResponse
+    from router.dto.user import UserResponse, UsersListResponse
+    from utils.pagination import Pagination, PaginationInfo
+    from utils.serialization import ListPageEncoder
+
+    info = Pagination().get_pagination_info(rows * 10, [], rows, 1)
+    results = {}
+    for name, docs, page_model, item_model in (
+        ("products", _product_docs(rows), ProductsListResponse, ProductResponse),
+        ("users", _user_docs(rows), UsersListResponse, UserResponse),
+    ):
+        encoder = ListPageEncoder(page_model, item_model, PaginationInfo)
+        default = _fastapi_default(page_model)
+        paths = {
+            "fastapi_response_model": lambda: default({"data": docs, "pagination_info": info}),
+            "type_adapter_validated": lambda: encoder.encode(docs, info, trusted=False),
+            "type_adapter_trusted": lambda: encoder.encode(docs, info, trusted=True),
+        }
+        outputs = {path: json.loads(fn()) for path, fn in paths.items()}
+        baseline = outputs["fastapi_response_model"]
+        results[name] = {
+            path: {**_time(fn, iterations), "same_output": outputs[path] == baseline}
+            for path, fn in paths.items()
+        }
+        base_mean = results[name]["fastapi_response_model"]["mean_us"]
+        for path in paths:
+            results[name][path]["speedup"] = round(base_mean / results[name][path]["mean_us"], 2)
+    return {"meta": {"rows_per_page": rows, "iterations": iterations}, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    output = json.dumps(run(args.rows, args.iterations), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
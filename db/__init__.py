@@ -1,3 +1,4 @@
 from db.mongo_service import MongoService
+from settings import settings
 
-mongo_service = MongoService(db_name="product-management")
\ No newline at end of file
+mongo_service = MongoService(db_name=settings.mongodb_db)
\ No newline at end of file
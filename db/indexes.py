@@ -0,0 +1,288 @@
+import sys
+import logging
+from itertools import combinations
+from typing import Iterable, Optional
+from pymongo import ASCENDING, IndexModel
+from db import mongo_service
+from utils.rate_limit import RATE_LIMIT_COLLECTION
+from utils.idempotency import IDEMPOTENCY_COLLECTION
+from utils.auth import REVOKED_TOKENS_COLLECTION
+from utils.helper import NOT_DELETED
+from utils.archiver import ARCHIVE_COLLECTIONS
+from utils.jobs import JOBS_COLLECTION
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Field equality yang bisa difilter di list produk (E pada aturan ESR)
+PRODUCT_EQUALITY_FIELDS = ("status", "category")
+# Hanya category yang cukup selektif untuk jadi prefix index; status (3 nilai) difilter dari key
+PRODUCT_PREFIX_FIELDS = ("category",)
+# Field sort yang di-whitelist (S)
+PRODUCT_SORT_FIELDS = ("name", "unit_price", "stock", "created_at")
+PRODUCT_DEFAULT_SORT = "-created_at"
+# Field range dan predicate low stock, dievaluasi di dalam index tanpa fetch dokumen (R)
+PRODUCT_RANGE_FIELDS = ("unit_price", "stock")
+# Batas key yang boleh di-scan per hasil untuk shape tanpa filter range/name (lihat --check)
+MAX_KEYS_PER_RESULT = 20
+
+# Dihitung ulang server-side setiap kali stock/low_stock berubah
+LOW_STOCK_EXPR = {"is_low_stock": {"$lte": ["$stock", "$low_stock"]}}
+
+
+def product_index_name(prefix: Iterable[str], sort_field: str) -> str:
+    return f"inv_browse_{'_'.join(prefix) or 'all'}_by_{sort_field}"
+
+
+def _product_index_keys(prefix: tuple, sort_field: str) -> list[tuple]:
+    # product_id langsung setelah sort field sebagai tie-breaker agar sort tetap dari index
+    keys = [(f, ASCENDING) for f in prefix]
+    keys += [(sort_field, ASCENDING), ("product_id", ASCENDING)]
+    # Sisa filter ikut jadi key: dicek dari index entry, dokumen hanya di-fetch jika cocok.
+    # is_deleted di akhir: NOT_DELETED ($ne) juga difilter dari key index.
+    trailing = [f for f in PRODUCT_EQUALITY_FIELDS if f not in prefix]
+    trailing += [f for f in ("name",) + PRODUCT_RANGE_FIELDS if f != sort_field]
+    keys += [(f, ASCENDING) for f in trailing]
+    keys += [("is_low_stock", ASCENDING), ("is_deleted", ASCENDING)]
+    return keys
+
+
+def product_index_shapes() -> list[tuple[tuple, str]]:
+    # Satu index per (prefix, sort): tanpa prefix dan per category, bukan per kombinasi filter
+    shapes = []
+    for n in range(len(PRODUCT_PREFIX_FIELDS) + 1):
+        for prefix in combinations(PRODUCT_PREFIX_FIELDS, n):
+            for sort_field in PRODUCT_SORT_FIELDS:
+                shapes.append((prefix, sort_field))
+    return shapes
+
+
+def product_query_shapes() -> list[tuple[tuple, str]]:
+    shapes = []
+    for n in range(len(PRODUCT_EQUALITY_FIELDS) + 1):
+        for equality in combinations(PRODUCT_EQUALITY_FIELDS, n):
+            for sort_field in PRODUCT_SORT_FIELDS:
+                shapes.append((equality, sort_field))
+    return shapes
+
+
+def product_query_plan(query: dict, sort: Optional[str]) -> tuple[list[tuple], str]:
+    """
+    Query-shape check untuk list produk: kembalikan (sort spec, nama index).
+    Query dengan category memakai index berprefix category, sisanya index sort saja;
+    filter lain dicek dari key index. Index dipaksa lewat hint, jadi tidak pernah COLLSCAN.
+    """
+    sort = sort or PRODUCT_DEFAULT_SORT
+    direction = -1 if sort.startswith("-") else 1
+    sort_field = sort.lstrip("-")
+    if sort_field not in PRODUCT_SORT_FIELDS:
+        raise ValueError(f"Unsupported sort field: {sort_field}")
+    unknown = (
+        set(query)
+        - set(PRODUCT_EQUALITY_FIELDS)
+        - set(PRODUCT_RANGE_FIELDS)
+        - {"name", "is_low_stock", "is_deleted"}
+    )
+    if query.get("is_deleted") != NOT_DELETED["is_deleted"]:
+        # List produk tidak boleh menampilkan dokumen yang sudah di-soft-delete
+        raise ValueError("Product list queries must filter on NOT_DELETED")
+    if unknown:
+        raise ValueError(f"Unsupported product filter: {', '.join(sorted(unknown))}")
+    prefix = tuple(f for f in PRODUCT_PREFIX_FIELDS if f in query)
+    sort_spec = [(sort_field, direction), ("product_id", direction)]
+    return sort_spec, product_index_name(prefix, sort_field)
+
+
+def product_indexes() -> list[IndexModel]:
+    indexes = [
+        IndexModel([("product_id", ASCENDING)], name="inv_product_id", unique=True),
+        # Dipakai archiver: soft-deleted lama dan produk non-active yang lama tidak diubah
+        IndexModel([("deleted_at", ASCENDING)], name="inv_deleted_at", partialFilterExpression={"is_deleted": True}),
+        IndexModel(
+            [("status", ASCENDING), ("updated_at", ASCENDING), ("is_deleted", ASCENDING)],
+            name="inv_status_updated_at",
+        ),
+    ]
+    # Bukan partial: partialFilterExpression tidak mendukung $ne, dan dokumen lama tanpa
+    # is_deleted harus tetap ter-index. Soft-deleted ikut ter-index sampai dipindah archiver.
+    for prefix, sort_field in product_index_shapes():
+        indexes.append(IndexModel(_product_index_keys(prefix, sort_field), name=product_index_name(prefix, sort_field)))
+    return indexes
+
+
+def user_indexes() -> list[IndexModel]:
+    return [
+        IndexModel([("user_id", ASCENDING)], name="users_user_id", unique=True),
+        IndexModel([("email", ASCENDING), ("is_deleted", ASCENDING)], name="users_email"),
+        IndexModel([("deleted_at", ASCENDING)], name="users_deleted_at", partialFilterExpression={"is_deleted": True}),
+    ]
+
+
+def backfill_low_stock_flag() -> int:
+    res = mongo_service.db["inventory"].update_many(
+        {"is_low_stock": {"$exists": False}}, [{"$set": LOW_STOCK_EXPR}]
+    )
+    return res.modified_count
+
+
+def backfill_soft_delete_flag(collection_name: str) -> int:
+    res = mongo_service.db[collection_name].update_many(
+        {"is_deleted": {"$exists": False}}, {"$set": {"is_deleted": False, "deleted_at": None}}
+    )
+    return res.modified_count
+
+
+def run_migrations() -> dict:
+    """
+    Backfill satu kali untuk dokumen dari sebelum field turunan ada. Dijalankan manual
+    (`python -m db.indexes --migrate`), bukan di startup: update_many dengan $exists men-scan
+    seluruh collection dan tidak boleh menahan /ready di setiap deploy.
+    """
+    result = {"inventory.is_low_stock": backfill_low_stock_flag()}
+    for collection_name in ("inventory", "users"):
+        result[f"{collection_name}.is_deleted"] = backfill_soft_delete_flag(collection_name)
+    for field, count in result.items():
+        if count:
+            logger.info(f"Backfilled {field} on {count} documents")
+    return result
+
+
+def _managed_indexes() -> list[tuple[str, list[IndexModel], str]]:
+    # (collection, index yang diinginkan, prefix nama index milik aplikasi)
+    return [("inventory", product_indexes(), "inv_"), ("users", user_indexes(), "users_")]
+
+
+def _obsolete_indexes(collection_name: str, indexes: list[IndexModel], prefix: str) -> list[str]:
+    # Index milik kita (prefix sama) yang sudah tidak ada di definisi saat ini
+    wanted = {index.document["name"] for index in indexes}
+    existing = mongo_service.db[collection_name].index_information()
+    return [name for name in existing if name.startswith(prefix) and name not in wanted]
+
+
+def drop_obsolete_indexes() -> list[str]:
+    """
+    Buang index lama secara eksplisit (`python -m db.indexes --drop-obsolete`) setelah semua
+    instance menjalankan versi baru. Tidak dilakukan di startup: saat rolling deploy, instance
+    versi lama masih meng-hint index lama dan query-nya akan gagal jika index itu hilang.
+    """
+    dropped = []
+    for collection_name, indexes, prefix in _managed_indexes():
+        for name in _obsolete_indexes(collection_name, indexes, prefix):
+            mongo_service.db[collection_name].drop_index(name)
+            logger.info(f"Dropped obsolete index {collection_name}.{name}")
+            dropped.append(f"{collection_name}.{name}")
+    return dropped
+
+
+def ensure_indexes() -> None:
+    # Hanya membuat index (idempotent); index lama dibiarkan sampai drop_obsolete_indexes()
+    for collection_name, indexes, prefix in _managed_indexes():
+        mongo_service.create_indexes(collection_name, indexes)
+        obsolete = _obsolete_indexes(collection_name, indexes, prefix)
+        if obsolete:
+            logger.info(f"Obsolete indexes on {collection_name} kept until --drop-obsolete: {', '.join(obsolete)}")
+    for archive_collection in ARCHIVE_COLLECTIONS:
+        mongo_service.create_indexes(
+            archive_collection,
+            [
+                IndexModel(
+                    [("archived_at", ASCENDING)],
+                    name=f"{archive_collection}_ttl",
+                    expireAfterSeconds=settings.archive_retention_days * 86400,
+                )
+            ],
+        )
+    mongo_service.create_indexes(
+        JOBS_COLLECTION,
+        [
+            IndexModel([("job_id", ASCENDING)], name="jobs_job_id", unique=True),
+            # claim_next: job jatuh tempo per status, dan lease yang habis
+            IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="jobs_status_run_at"),
+            IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)], name="jobs_status_locked_until"),
+            IndexModel([("type", ASCENDING), ("created_at", ASCENDING)], name="jobs_type_created_at"),
+            IndexModel([("expires_at", ASCENDING)], name="jobs_ttl", expireAfterSeconds=0),
+        ],
+    )
+    mongo_service.create_indexes(
+        RATE_LIMIT_COLLECTION,
+        [IndexModel([("expires_at", ASCENDING)], name="rate_limits_ttl", expireAfterSeconds=0)],
+    )
+    mongo_service.create_indexes(
+        IDEMPOTENCY_COLLECTION,
+        [IndexModel([("expires_at", ASCENDING)], name="idempotency_keys_ttl", expireAfterSeconds=0)],
+    )
+    mongo_service.create_indexes(
+        REVOKED_TOKENS_COLLECTION,
+        [IndexModel([("expires_at", ASCENDING)], name="revoked_tokens_ttl", expireAfterSeconds=0)],
+    )
+
+
+def _winning_stages(plan: dict) -> set[str]:
+    stages = {plan.get("stage")}
+    for child in plan.get("inputStages", []) + [plan.get("inputStage") or {}]:
+        if child:
+            stages |= _winning_stages(child)
+    return stages
+
+
+def _check_queries(sample: dict) -> list[tuple[str, dict, str]]:
+    # (label, query, sort) dengan nilai nyata dari sample agar hasilnya tidak kosong
+    checks = []
+    for equality, sort_field in product_query_shapes():
+        query = {**NOT_DELETED, **{f: sample[f] for f in equality}}
+        label = f"{'+'.join(equality) or 'all'} by {sort_field}"
+        checks.append((label, query, sort_field))
+        checks.append((f"{label} +name", {**query, "name": {"$regex": "1", "$options": "i"}}, sort_field))
+        checks.append((f"{label} +range", {**query, "unit_price": {"$gte": 0}, "is_low_stock": True}, sort_field))
+    return checks
+
+
+def check_product_query_shapes(limit: int = 50) -> tuple[int, list[str]]:
+    """
+    Jalankan explain (executionStats) untuk setiap shape list produk, termasuk filter name.
+    Gagal jika plan butuh COLLSCAN/in-memory SORT, men-fetch dokumen yang tidak dikembalikan
+    (filter tidak bisa dicek dari key index), atau men-scan key terlalu banyak per hasil.
+    Butuh data di inventory; plan tanpa hint ikut dicatat untuk perbandingan.
+    """
+    collection = mongo_service.db["inventory"]
+    sample = collection.find_one(NOT_DELETED, {"status": 1, "category": 1})
+    if sample is None:
+        return 0, ["inventory is empty; seed data before --check"]
+    checks = _check_queries(sample)
+    failures = []
+    for label, query, sort_field in checks:
+        sort_spec, hint = product_query_plan(query, sort_field)
+        explain = collection.find(query).sort(sort_spec).limit(limit).hint(hint).explain()
+        winning = explain["queryPlanner"]["winningPlan"]
+        stages = {s for s in _winning_stages(winning.get("queryPlan", winning)) if s}
+        stats = explain["executionStats"]
+        returned, docs, keys = stats["nReturned"], stats["totalDocsExamined"], stats["totalKeysExamined"]
+        problems = []
+        if "COLLSCAN" in stages or "SORT" in stages:
+            problems.append(f"stages {sorted(stages)}")
+        if docs > returned:
+            problems.append(f"{docs} docs examined for {returned} returned")
+        # Filter equality saja harus selektif lewat index; name/range bergantung pada data
+        if set(query) <= {"is_deleted", *PRODUCT_EQUALITY_FIELDS} and keys > max(returned, 1) * MAX_KEYS_PER_RESULT:
+            problems.append(f"{keys} keys examined for {returned} returned")
+        if problems:
+            unhinted = collection.find(query).sort(sort_spec).limit(limit).explain()["queryPlanner"]["winningPlan"]
+            plan = unhinted.get("queryPlan", unhinted)
+            chosen = sorted(s for s in _winning_stages(plan) if s)
+            failures.append(f"{label} [{hint}]: {'; '.join(problems)} (unhinted plan: {chosen})")
+    return len(checks), failures
+
+
+if __name__ == "__main__":
+    # python -m db.indexes [--migrate] [--drop-obsolete] [--check]
+    ensure_indexes()
+    if "--migrate" in sys.argv:
+        print(f"Backfilled: {run_migrations()}")
+    if "--drop-obsolete" in sys.argv:
+        print(f"Dropped: {drop_obsolete_indexes() or 'nothing'}")
+    if "--check" in sys.argv:
+        total, failures = check_product_query_shapes()
+        for failure in failures:
+            print(f"FAIL {failure}")
+        print(f"{total - len(failures)}/{total} query shapes index-backed")
+        sys.exit(1 if failures else 0)
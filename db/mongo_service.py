@@ -1,16 +1,84 @@
 import os
-from pymongo import MongoClient
+import threading
+from pymongo import MongoClient, ReturnDocument, UpdateOne, ReplaceOne, IndexModel, monitoring
 from bson.objectid import ObjectId
 from datetime import datetime
 from typing import Dict
 from settings import settings
+from utils.profiling import profile_ctx, profiling_enabled
+
+
+class MongoProfileListener(monitoring.CommandListener):
+    # Dipanggil sinkron di thread yang menjalankan command, jadi contextvar request masih terlihat
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._add(event, ok=True)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._add(event, ok=False)
+
+    @staticmethod
+    def _add(event, ok: bool) -> None:
+        profile = profile_ctx.get()
+        if profile is None:
+            return
+        ms = event.duration_micros / 1000
+        profile.add_leaf("mongo", ms, {"command": event.command_name, "ms": round(ms, 2), "ok": ok})
 
 
 class MongoService:
     def __init__(self, db_name: str, uri: str | None = None):
-        mongo_uri = settings.mongodb_uri 
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client[db_name]
+        # Client dibuat lazy (connect()) agar import cepat dan client dibuat setelah fork worker
+        self.db_name = db_name
+        self.uri = uri
+        self._client: MongoClient | None = None
+        self._db = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def connect(self) -> MongoClient:
+        with self._lock:
+            # connect() eksplisit (mis. lifespan berikutnya di test) membuka lagi setelah close()
+            self._closed = False
+            if self._client is None:
+                self._client = MongoClient(
+                    self.uri or settings.mongodb_uri,
+                    minPoolSize=settings.mongodb_min_pool_size,
+                    # Listener membuat event per command; hanya dipasang jika profiling aktif
+                    event_listeners=[MongoProfileListener()] if profiling_enabled() else [],
+                )
+                self._db = self._client[self.db_name]
+        return self._client
+
+    def use_client(self, client) -> None:
+        # Untuk stand-in (mis. mongomock) di benchmark
+        with self._lock:
+            self._closed = False
+            self._client = client
+            self._db = client[self.db_name]
+
+    def _ensure_open(self) -> None:
+        # Lazy connect hanya sebelum close(); setelah shutdown, sisa kerja di thread
+        # (job, archiver, stream) harus gagal, bukan diam-diam membuat client baru
+        if self._closed:
+            raise RuntimeError("MongoService is closed")
+        if self._client is None:
+            self.connect()
+
+    @property
+    def client(self) -> MongoClient:
+        self._ensure_open()
+        return self._client
+
+    @property
+    def db(self):
+        self._ensure_open()
+        return self._db
+
+    def ping(self):
+        return self.client.admin.command("ping")
 
     def insert_one(self, collection_name: str, data: dict):
         data["created_at"] = datetime.now()
@@ -31,10 +99,25 @@ class MongoService:
     #     cursor = self.db[collection_name].find(query, skip=skip, limit=limit)
     #     return list(cursor)
 
-    def find_many(self, collection_name: str, query: Dict, skip: int = 0, limit: int = 10):
-        return list(self.db[collection_name].find(query, {'_id': 0}).skip(skip).limit(limit))
+    def find_many(
+        self,
+        collection_name: str,
+        query: Dict,
+        skip: int = 0,
+        limit: int = 10,
+        sort: list[tuple] | None = None,
+        hint: str | None = None,
+    ):
+        cursor = self.db[collection_name].find(query, {'_id': 0})
+        if sort:
+            cursor = cursor.sort(sort)
+        if hint:
+            cursor = cursor.hint(hint)
+        return list(cursor.skip(skip).limit(limit))
 
-    def count_documents(self, collection_name: str, query: Dict):
+    def count_documents(self, collection_name: str, query: Dict, hint: str | None = None):
+        if hint:
+            return self.db[collection_name].count_documents(query, hint=hint)
         return self.db[collection_name].count_documents(query)
 
     def update_one(self, collection_name: str, query: dict, data: dict):
@@ -49,5 +132,65 @@ class MongoService:
     def delete_one(self, collection_name: str, query: dict):
         return self.db[collection_name].delete_one(query)
 
+    def find_one_and_update(
+        self,
+        collection_name: str,
+        query: dict,
+        data: dict,
+        projection: Dict | None = None,
+        return_document: bool = ReturnDocument.AFTER,
+        computed: Dict | None = None,
+    ):
+        # Satu round trip: update + kembalikan dokumen (AFTER default, BEFORE untuk ambil nilai lama)
+        data["updated_at"] = datetime.now()
+        update = {"$set": data}
+        if computed:
+            # Pipeline update agar field turunan dihitung dari nilai baru di server
+            update = [
+                {"$set": {k: {"$literal": v} for k, v in data.items()}},
+                {"$set": computed},
+            ]
+        return self.db[collection_name].find_one_and_update(
+            query,
+            update,
+            projection=projection or {'_id': 0},
+            return_document=return_document,
+        )
+
+    def find_one_and_delete(self, collection_name: str, query: dict, projection: Dict | None = None):
+        return self.db[collection_name].find_one_and_delete(
+            query, projection=projection or {'_id': 0}
+        )
+
+    def aggregate(self, collection_name: str, pipeline: list[dict]):
+        return list(self.db[collection_name].aggregate(pipeline))
+
+    def inc_many(self, collection_name: str, incs: Dict[str, dict]):
+        # $inc per _id dalam satu bulk_write, dokumen dibuat jika belum ada
+        if not incs:
+            return None
+        now = datetime.now()
+        ops = [
+            UpdateOne({"_id": key}, {"$inc": inc, "$set": {"updated_at": now}}, upsert=True)
+            for key, inc in incs.items()
+        ]
+        return self.db[collection_name].bulk_write(ops, ordered=False)
+
+    def replace_many(self, collection_name: str, docs: list[dict]):
+        # Upsert per _id dalam satu bulk_write: dokumen lama tetap terbaca sampai diganti
+        if not docs:
+            return None
+        now = datetime.now()
+        ops = [ReplaceOne({"_id": doc["_id"]}, {**doc, "updated_at": now}, upsert=True) for doc in docs]
+        return self.db[collection_name].bulk_write(ops, ordered=False)
+
+    def create_indexes(self, collection_name: str, indexes: list[IndexModel]):
+        return self.db[collection_name].create_indexes(indexes)
+
     def close(self):
-        self.client.close()
\ No newline at end of file
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            self._client = None
+            self._db = None
+            self._closed = True
\ No newline at end of file
@@ -0,0 +1,20 @@
+# Alternatif serve.py untuk deployment yang memakai gunicorn sebagai process manager:
+#   SERVER_PROFILE=io gunicorn main:app -c gunicorn.conf.py
+# Profile (threadpool, admission control, pool Mongo) sama dengan serve.py.
+import os
+from serve import PROFILES, default_workers
+
+for _key, _value in PROFILES[os.getenv("SERVER_PROFILE", "io")].items():
+    os.environ.setdefault(_key, _value)
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = default_workers()
+worker_class = "uvicorn.workers.UvicornWorker"
+# Jangan preload: app (dan client Mongo) harus dibuat setelah fork di tiap worker
+preload_app = False
+backlog = 2048
+keepalive = 5
+# Worker baru mulai drain setelah jeda pre-stop (lihat utils/readiness.py), jadi keduanya dijumlahkan
+graceful_timeout = int(os.getenv("SHUTDOWN_GRACE_SECONDS", "30")) + int(float(os.getenv("SHUTDOWN_PRESTOP_SECONDS", "5")))
+timeout = 60
+accesslog = None
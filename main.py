@@ -15,26 +15,90 @@
 
 
 # See PyCharm help at https://www.jetbrains.com/help/pycharm/
-from fastapi import FastAPI
+import asyncio
+import importlib
+import anyio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 import logging
 from middleware.request_logger import RequestLoggingMiddleware
+from middleware.profiler import ProfilingMiddleware
+from middleware.admission import AdmissionControlMiddleware
+from middleware.rate_limit import RateLimitMiddleware
+from middleware.idempotency import IdempotencyMiddleware
 from utils.logging_config import setup_logging
+from utils.profiling import instrument_fastapi, profiling_enabled
+from utils.readiness import readiness
+from settings import settings
 
-
+# Router di-include saat import agar route ada tanpa lifespan (TestClient tanpa `with`,
+# ASGITransport, `--lifespan off`). Lifespan hanya melakukan I/O: client Mongo, warm-up, worker.
 CONTROLLER_MODULES = {
     "product": "product_controller",
     "user": "user_controller",
     "auth": "auth_controller",
+    "stream": "stream_controller",
+    "profiling": "profiling_controller",
+    "job": "job_controller",
 }
-setup_logging()
 logger = logging.getLogger(__name__)
 
+
+def include_controllers(app: FastAPI) -> None:
+    for controller_name, module_name in CONTROLLER_MODULES.items():
+        module = importlib.import_module(f"router.controller.{module_name}")
+        app.include_router(module.router)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    # Handler sync (pymongo) jalan di threadpool anyio; ukurannya diatur per profile
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    from db import mongo_service
+
+    # Client dibuat di sini (setelah fork worker), bukan saat import
+    mongo_service.connect()
+    warm_up = asyncio.create_task(readiness.warm_up())
+    if settings.jobs_enabled:
+        from utils.jobs import job_queue
+
+        await job_queue.start(settings.job_concurrency)
+    if settings.catalog_snapshot_enabled:
+        from utils.catalog import catalog
+
+        catalog.start()
+    archiver = None
+    if settings.archiver_enabled:
+        from utils.archiver import archiver_loop
+
+        archiver = asyncio.create_task(archiver_loop())
+    try:
+        with readiness.shutdown_signals():
+            yield
+    finally:
+        readiness.mark_shutting_down()
+        warm_up.cancel()
+        if archiver:
+            archiver.cancel()
+        if settings.jobs_enabled:
+            await job_queue.stop()
+        if settings.catalog_snapshot_enabled:
+            catalog.stop()
+        mongo_service.close()
+
+
 app = FastAPI(
-    title="Product Management API", description="The API for product management"
+    title="Product Management API",
+    description="The API for product management",
+    lifespan=lifespan,
 )
+include_controllers(app)
 
 os.makedirs(os.path.join("static", "avatars"), exist_ok=True)
 os.makedirs(os.path.join("static", "products"), exist_ok=True)
@@ -53,16 +117,31 @@ app.add_middleware(
     allow_headers=['*'],
 )
 
+# Urutan luar -> dalam: RequestLogging, RateLimit, Idempotency, AdmissionControl, Profiling
+# (middleware yang ditambahkan terakhir menjadi yang paling luar)
+if profiling_enabled():
+    instrument_fastapi()
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(AdmissionControlMiddleware)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(RequestLoggingMiddleware)
 
-for controller_name, module_name in CONTROLLER_MODULES.items():
-        module = __import__(f"router.controller.{module_name}", fromlist=["router"])
-        app.include_router(module.router)
-
-
 
 @app.get("/")
 def root():
     logger.info("Root endpoint accessed")
     return {"message": "Heal the World"}
 
+
+@app.get("/health")
+def health():
+    # Liveness: proses hidup dan event loop merespons
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    # Readiness: warm-up (Mongo, index, bcrypt) selesai
+    code = status.HTTP_200_OK if readiness.ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(status_code=code, content=jsonable_encoder(readiness.to_dict()))
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from typing import Callable
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from settings import settings
+
+logger = logging.getLogger("app.middleware.admission")
+
+
+class AdmissionControlMiddleware(BaseHTTPMiddleware):
+    """
+    Batasi request yang berjalan bersamaan. Request berlebih menunggu di antrean
+    hingga `queue_timeout_seconds`; jika antrean sudah melewati batas, langsung 503
+    dengan Retry-After agar overload turun secara terprediksi.
+    """
+
+    def __init__(self, app, max_concurrent: int | None = None, max_queued: int | None = None):
+        super().__init__(app)
+        self.max_concurrent = max_concurrent or settings.max_concurrent_requests
+        self.max_queued = max_queued if max_queued is not None else settings.max_queued_requests
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.queued = 0
+
+    def _overloaded(self, retry_after: int) -> JSONResponse:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server is busy, please retry"},
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        if self._semaphore.locked():
+            if self.queued >= self.max_queued:
+                logger.warning(f"load shed: queue depth {self.queued} >= {self.max_queued}")
+                return self._overloaded(retry_after=1)
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=settings.queue_timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.warning(f"load shed: waited {settings.queue_timeout_seconds}s for a slot")
+                return self._overloaded(retry_after=2)
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+        try:
+            return await call_next(request)
+        finally:
+            self._semaphore.release()
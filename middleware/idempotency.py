@@ -0,0 +1,94 @@
+import logging
+from typing import Callable
+import anyio
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from utils.tokens import token_subject
+
+logger = logging.getLogger("app.middleware.idempotency")
+
+IDEMPOTENT_METHODS = {"POST", "PUT"}
+MAX_KEY_LENGTH = 255
+# Header response yang disimpan untuk replay
+REPLAY_HEADERS = ("content-type", "location")
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    """
+    Dukungan header `Idempotency-Key` untuk POST/PUT. Response pertama disimpan di
+    collection TTL `idempotency_keys`; retry dengan key yang sama mendapat response
+    tersimpan tanpa menjalankan ulang write ke DB maupun disk.
+    """
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        key_header = request.headers.get("Idempotency-Key")
+        if request.method not in IDEMPOTENT_METHODS or not key_header:
+            return await call_next(request)
+        # Import lazy: modul ini menarik pymongo, tidak perlu di jalur import main
+        from utils import idempotency
+        if len(key_header) > MAX_KEY_LENGTH:
+            return JSONResponse(status_code=400, content={"detail": "Idempotency-Key too long"})
+
+        subject = token_subject(request.headers.get("Authorization"))
+        key = idempotency.record_key(key_header, request.method, request.url.path, subject)
+        body_fingerprint = idempotency.fingerprint(await request.body(), request.headers.get("content-type"))
+
+        existing = await run_in_threadpool(idempotency.reserve, key, body_fingerprint)
+        if existing is not None:
+            return self._replay(existing, body_fingerprint)
+
+        try:
+            response = await call_next(request)
+            if response.status_code >= 500:
+                await self._release(key)
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+        except BaseException:
+            # Termasuk CancelledError (client putus/shutdown): key jangan tertahan in_progress
+            await self._release(key)
+            raise
+
+        headers = {k: v for k, v in response.headers.items() if k in REPLAY_HEADERS}
+        await run_in_threadpool(idempotency.complete, key, response.status_code, headers, body)
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            background=response.background,
+        )
+
+    @staticmethod
+    async def _release(key: str) -> None:
+        from utils import idempotency
+
+        # Shield: release tetap jalan walau task sedang di-cancel
+        with anyio.CancelScope(shield=True):
+            try:
+                await run_in_threadpool(idempotency.release, key)
+            except Exception as e:
+                # Lease locked_until tetap membatasi berapa lama key tertahan
+                logger.error(f"Failed to release Idempotency-Key: {e}")
+
+    @staticmethod
+    def _replay(existing: dict, body_fingerprint: str) -> Response:
+        from utils import idempotency
+
+        if existing.get("fingerprint") and existing["fingerprint"] != body_fingerprint:
+            return JSONResponse(
+                status_code=422,
+                content={"detail": "Idempotency-Key was already used with a different request body"},
+            )
+        if existing.get("state") != idempotency.COMPLETED:
+            return JSONResponse(
+                status_code=409,
+                content={"detail": "A request with this Idempotency-Key is still in progress"},
+                headers={"Retry-After": "1"},
+            )
+        logger.info("Replaying stored response for Idempotency-Key")
+        return Response(
+            content=existing.get("body") or b"",
+            status_code=existing["status_code"],
+            headers={**(existing.get("headers") or {}), "Idempotent-Replayed": "true"},
+        )
@@ -0,0 +1,34 @@
+import time
+import logging
+from typing import Callable
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from settings import settings
+from utils.profiling import RequestProfile, profile_ctx, should_profile, slow_requests
+
+logger = logging.getLogger("app.middleware.profiler")
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        enabled, forced = should_profile(request.headers.get("X-Profile"))
+        if not enabled:
+            return await call_next(request)
+
+        profile = RequestProfile(request.method, request.url.path, forced=forced)
+        token = profile_ctx.set(profile)
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            profile.finish(status_code, (time.perf_counter() - start) * 1000)
+            profile_ctx.reset(token)
+            if forced or profile.duration_ms >= settings.slow_request_ms:
+                slow_requests.add(profile)
+                logger.warning(f'slow/profiled "{profile.method} {profile.path}" {profile.server_timing()}')
+
+        response.headers["Server-Timing"] = profile.server_timing()
+        return response
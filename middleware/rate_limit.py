@@ -0,0 +1,47 @@
+import math
+import logging
+from typing import Callable
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from settings import settings
+from utils.tokens import token_subject
+from utils.rate_limit import RATE_LIMIT_POLICIES, rate_limiter
+
+logger = logging.getLogger("app.middleware.rate_limit")
+
+
+def too_many_requests(retry_after: float, detail: str = "Too many requests") -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        if not settings.rate_limit_enabled:
+            return await call_next(request)
+
+        method, path = request.method, request.url.path
+        client = request.client.host if request.client else "-"
+        user_id = None
+        for policy in RATE_LIMIT_POLICIES:
+            if not policy.matches(method, path):
+                continue
+            if policy.scope == "user" and user_id is None:
+                user_id = token_subject(request.headers.get("Authorization")) or ""
+            subject = f"user:{user_id}" if policy.scope == "user" and user_id else f"ip:{client}"
+            key = f"{policy.name}:{subject}"
+            if rate_limiter.blocking:
+                allowed, retry_after = await run_in_threadpool(
+                    rate_limiter.hit, key, policy.rate, policy.burst
+                )
+            else:
+                allowed, retry_after = rate_limiter.hit(key, policy.rate, policy.burst)
+            if not allowed:
+                logger.warning(f'rate limited "{method} {path}" policy={policy.name} {subject}')
+                return too_many_requests(retry_after)
+        return await call_next(request)
@@ -1,5 +1,6 @@
 import uuid
 import os
+import math
 import logging
 from router import router_param_builder
 from utils.pagination import Pagination
@@ -10,13 +11,16 @@ from utils.auth import (
     get_password_hash,
     verify_password,
     oauth2_scheme,
-    token_blacklist,
+    revoke_token,
 )
 from router.dto.user import (
     UserRegister,
     UserRegisterResponse,
 )
 from db import mongo_service
+from settings import settings
+from utils.helper import NOT_DELETED
+from utils.rate_limit import rate_limiter, LOGIN_ACCOUNT_RATE, LOGIN_ACCOUNT_BURST
 from pymongo.errors import DuplicateKeyError, PyMongoError
 from fastapi.security import OAuth2PasswordRequestForm
 from pathlib import Path
@@ -42,7 +46,7 @@ logger = logging.getLogger(__name__)
 def register(payload: UserRegister):
 
     email = payload.email.strip().lower()
-    existing = mongo_service.find_one("users", {"email": email})
+    existing = mongo_service.find_one("users", {"email": email, **NOT_DELETED})
     if existing:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Email already registered"
@@ -59,6 +63,8 @@ def register(payload: UserRegister):
         "status": payload.status,
         "roles": roles,
         "password": get_password_hash(payload.password),
+        "is_deleted": False,
+        "deleted_at": None,
     }
     try:
         mongo_service.insert_one("users", user_doc)
@@ -79,7 +85,17 @@ def register(payload: UserRegister):
 def login(form_data: OAuth2PasswordRequestForm = Depends()):
     email = form_data.username.strip().lower()
     logger.info(f"Attempting login for email: {email}")
-    user = mongo_service.find_one("users", {"email": email})
+    if settings.rate_limit_enabled:
+        # Batasi percobaan per akun (semua IP) sebelum find_one + bcrypt verify; per IP sudah
+        # ditangani policy login-ip
+        allowed, retry_after = rate_limiter.hit(f"login-account:{email}", LOGIN_ACCOUNT_RATE, LOGIN_ACCOUNT_BURST)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+    user = mongo_service.find_one("users", {"email": email, **NOT_DELETED})
     logger.info(f"User result: {'found' if user else 'not found'}")
     if not user:
         raise HTTPException(
@@ -103,6 +119,6 @@ def me(current_user: dict = Depends(get_current_user)):
 
 @router.post("/api/v1/logout")
 def logout(token: str = Depends(oauth2_scheme)):
-    # Add token to blacklist (demo). For production, consider short TTLs or server-side sessions.
-    token_blacklist.add(token)
+    # Disimpan di collection TTL agar berlaku di semua worker
+    revoke_token(token)
     return {"message": "Logged out"}
\ No newline at end of file
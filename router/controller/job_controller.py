@@ -0,0 +1,57 @@
+import os
+from fastapi import APIRouter, Query, HTTPException, status, Depends
+from router import router_param_builder
+from db import mongo_service
+from utils.auth import require_roles
+from utils.pagination import Pagination
+from utils import jobs
+from router.dto.job import JobFilters, JobResponse, JobsListResponse
+
+pagination = Pagination()
+
+tag = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
+router = APIRouter(**router_param_builder(tag))
+
+
+@router.get("/api/v1/jobs", response_model=JobsListResponse)
+def get_all_jobs(
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=200),
+    filters: JobFilters = Depends(),
+    _=Depends(require_roles(["admin"])),
+):
+    query = {}
+    if filters.status:
+        query["status"] = filters.status
+    if filters.type:
+        query["type"] = filters.type
+
+    total_data = mongo_service.count_documents(jobs.JOBS_COLLECTION, query)
+    paging = pagination.get_paging(str(page), str(size))
+    job_items = mongo_service.find_many(
+        jobs.JOBS_COLLECTION,
+        query,
+        paging.get("offset"),
+        paging.get("limit"),
+        sort=[("created_at", -1)],
+    )
+    paging_info = pagination.get_pagination_info(total_data, [], size, page)
+    return {"data": job_items, "pagination_info": paging_info}
+
+
+@router.get("/api/v1/{job_id}", response_model=JobResponse)
+def get_job_by_id(job_id: str, _=Depends(require_roles(["admin"]))):
+    job = mongo_service.find_one(jobs.JOBS_COLLECTION, {"job_id": job_id})
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.post("/api/v1/{job_id}/retry", response_model=JobResponse)
+def retry_job(job_id: str, _=Depends(require_roles(["admin"]))):
+    job = jobs.retry(job_id)
+    if job is None:
+        if mongo_service.find_one(jobs.JOBS_COLLECTION, {"job_id": job_id}) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Only failed jobs can be retried")
+    return job
@@ -12,12 +12,18 @@ from fastapi import (
     UploadFile,
     File,
 )
-from typing import List, Optional
+from typing import List
 from router import router_param_builder
-from utils.helper import ensure_exists
+from datetime import datetime
+from utils.helper import ensure_exists, is_low_stock, order_by_ids, NOT_DELETED
 from db import mongo_service
-from utils.pagination import Pagination
+from db.indexes import LOW_STOCK_EXPR, product_query_plan
+from utils.pagination import Pagination, PaginationInfo
+from utils.serialization import ListPageEncoder
 from utils.auth import require_roles
+from utils import inventory_summary
+from utils.jobs import enqueue_file_cleanup
+from utils.catalog import catalog
 from router.dto.product import (
     ProductBulkCreate,
     ProductCreate,
@@ -25,7 +31,11 @@ from router.dto.product import (
     ProductUpdate,
     ProductFilters,
     ProductsListResponse,
+    InventorySummaryResponse,
+    ProductBatchRequest,
+    ProductBatchResponse,
 )
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError, BulkWriteError, PyMongoError
 from pathlib import Path
 
@@ -33,8 +43,19 @@ from pathlib import Path
 ALLOWED_MIMES = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
 MAX_BYTES = 2 * 1024 * 1024  # 2 MB
 PRODUCT_IMAGE_DIR = Path("static") / "products"
+MAX_BULK_CREATE = 500
+# Field yang dibutuhkan untuk menjaga inventory_summary tetap konsisten
+SUMMARY_PROJECTION = {
+    "_id": 0,
+    "category": 1,
+    "status": 1,
+    "stock": 1,
+    "unit_price": 1,
+    "low_stock": 1,
+}
 
 pagination = Pagination()
+products_encoder = ListPageEncoder(ProductsListResponse, ProductResponse, PaginationInfo)
 
 tag = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
 router = APIRouter(**router_param_builder(tag))
@@ -46,28 +67,104 @@ def get_all_products(
     size: int = Query(10, ge=1, le=200),
     filters: ProductFilters = Depends(),
 ):
-    query = {}
+    paging = pagination.get_paging(str(page), str(size))
+    if catalog.ready:
+        # Read replica mode: dilayani dari snapshot di memori, bukan Mongo
+        product_items, total_data = catalog.query(filters, paging.get("offset"), paging.get("limit"))
+        paging_info = pagination.get_pagination_info(total_data, [], size, page)
+        return products_encoder.response(product_items, paging_info)
+
+    query = dict(NOT_DELETED)
     if filters.name:
         pattern = re.escape(filters.name)
         query["name"] = {"$regex": pattern, "$options": "i"}
     if filters.status:
-        query["status"] = filters.status 
+        query["status"] = filters.status
+    if filters.category:
+        query["category"] = filters.category
+    if filters.min_price is not None or filters.max_price is not None:
+        query["unit_price"] = _range(filters.min_price, filters.max_price)
+    if filters.min_stock is not None or filters.max_stock is not None:
+        query["stock"] = _range(filters.min_stock, filters.max_stock)
+    if filters.low_stock_only:
+        query["is_low_stock"] = True
 
-    total_data = mongo_service.count_documents("inventory", query)
-    paging = pagination.get_paging(str(page), str(size))
+    # Query-shape check: setiap kombinasi filter + sort punya index yang di-hint
+    sort_spec, hint = product_query_plan(query, filters.sort)
+    total_data = mongo_service.count_documents("inventory", query, hint=hint)
     product_items = mongo_service.find_many(
-        "inventory", query, paging.get("offset"), paging.get("limit")
+        "inventory",
+        query,
+        paging.get("offset"),
+        paging.get("limit"),
+        sort=sort_spec,
+        hint=hint,
     )
     # result = [convert_object_id(item) for item in product_items]
-    paging_info = pagination.get_pagination_info(
-        str(total_data), [], str(size), str(page)
-    )
-    return {"data": product_items, "pagination_info": paging_info}
+    paging_info = pagination.get_pagination_info(total_data, [], size, page)
+    return products_encoder.response(product_items, paging_info)
+
+
+def _range(low, high) -> dict:
+    bounds = {}
+    if low is not None:
+        bounds["$gte"] = low
+    if high is not None:
+        bounds["$lte"] = high
+    return bounds
+
+
+@router.get("/api/v1/products/summary", response_model=InventorySummaryResponse)
+def get_products_summary():
+    # Dibaca dari collection materialized, bukan scan `inventory`
+    try:
+        return inventory_summary.get_summary()
+    except PyMongoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error while reading summary",
+        ) from e
+
+
+@router.post("/api/v1/products/summary/rebuild", response_model=InventorySummaryResponse)
+def rebuild_products_summary(_=Depends(require_roles(["admin"]))):
+    try:
+        return inventory_summary.rebuild_summary()
+    except PyMongoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error while rebuilding summary",
+        ) from e
+
+
+@router.post("/api/v1/products/batch", response_model=ProductBatchResponse)
+def get_products_by_ids(payload: ProductBatchRequest):
+    # Satu query $in menggantikan N kali get_product_by_id; id duplikat di-dedupe
+    ids = list(dict.fromkeys(payload.ids))
+    products = catalog.get_many(ids) if catalog.ready else []
+    # Yang tidak ada di snapshot (atau snapshot mati) dicari di Mongo
+    cached = {p["product_id"] for p in products}
+    remaining = [i for i in ids if i not in cached]
+    if remaining:
+        products += mongo_service.find_many(
+            "inventory", {"product_id": {"$in": remaining}, **NOT_DELETED}, limit=len(remaining)
+        )
+    found, missing = order_by_ids(products, "product_id", ids)
+    return {"data": found, "missing": missing}
+
+
+@router.get("/api/v1/products/catalog")
+def get_catalog_stats(_=Depends(require_roles(["admin"]))):
+    # Status read replica dan pemakaian memori snapshot (per worker)
+    return catalog.stats()
 
 
 @router.get("/api/v1/{product_id}", response_model=ProductResponse)
 def get_product_by_id(product_id: str):
-    product = mongo_service.find_one("inventory", {"product_id": product_id})
+    product = catalog.get(product_id) if catalog.ready else None
+    if product is not None:
+        return product
+    product = mongo_service.find_one("inventory", {"product_id": product_id, **NOT_DELETED})
     return ensure_exists(product, "Product")
 
 
@@ -76,11 +173,16 @@ def get_product_by_id(product_id: str):
     response_model=ProductBulkCreate,
     status_code=status.HTTP_201_CREATED,
 )
-def create_products(products: List[ProductCreate] = Body(..., min_items=1)):
+def create_products(
+    products: List[ProductCreate] = Body(..., min_length=1, max_length=MAX_BULK_CREATE)
+):
     product_docs = []
     for p in products:
         doc = p.dict()
         doc["product_id"] = str(uuid.uuid4())
+        doc["is_low_stock"] = is_low_stock(doc)
+        doc["is_deleted"] = False
+        doc["deleted_at"] = None
         product_docs.append(doc)
     try:
         # Will raise on failure; on success, we don't need the returned IDs since we generate product_id
@@ -109,6 +211,9 @@ def create_products(products: List[ProductCreate] = Body(..., min_items=1)):
             detail="Unexpected error while creating products",
         ) from e
 
+    inventory_summary.record_created(product_docs)
+    for doc in product_docs:
+        catalog.apply_local(doc["product_id"], doc)
     return {"status": status.HTTP_201_CREATED, "data": product_docs}
 
 
@@ -119,36 +224,40 @@ def update_product(product_id: str, payload: ProductUpdate):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update"
         )
-    res = mongo_service.update_one("inventory", {"product_id": product_id}, update)
-    if res.matched_count == 0:
+    # Ambil dokumen lama sekaligus agar delta summary bisa dihitung
+    before = mongo_service.find_one_and_update(
+        "inventory",
+        {"product_id": product_id, **NOT_DELETED},
+        update,
+        return_document=ReturnDocument.BEFORE,
+        computed=LOW_STOCK_EXPR,
+    )
+    if not before:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
         )
-    product = mongo_service.find_one("inventory", {"product_id": product_id})
+    product = {**before, **update}
+    product["is_low_stock"] = is_low_stock(product)
+    inventory_summary.record_updated(before, product)
+    catalog.apply_local(product_id, product)
     return product
 
 @router.delete("/api/v1/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_product(product_id: str, _=Depends(require_roles(["admin"]))):
-    # Hapus file image jika ada sebelum delete dokumen
-    product = mongo_service.find_one("inventory", {"product_id": product_id})
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
-        )
-    image_url: Optional[str] = product.get("image_url")
-    if image_url and image_url.startswith("/static/products/"):
-        try:
-            p = Path(image_url.lstrip("/")).resolve()
-            if p.is_file() and PRODUCT_IMAGE_DIR.resolve() in p.parents:
-                p.unlink(missing_ok=True)
-        except Exception:
-            pass
-
-    res = mongo_service.delete_one("inventory", {"product_id": product_id})
-    if res.deleted_count == 0:
+    # Soft delete: dokumen dan file image dipindah/dibersihkan oleh archiver (utils/archiver.py)
+    product = mongo_service.find_one_and_update(
+        "inventory",
+        {"product_id": product_id, **NOT_DELETED},
+        {"is_deleted": True, "deleted_at": datetime.now()},
+        projection=SUMMARY_PROJECTION,
+        return_document=ReturnDocument.BEFORE,
+    )
+    if product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
         )
+    inventory_summary.record_deleted(product)
+    catalog.apply_local(product_id, None)
     return None
 
 @router.post("/api/v1/{product_id}/image")
@@ -157,11 +266,6 @@ async def upload_product_image(
     file: UploadFile = File(...),
     _=Depends(require_roles(["admin"])),
 ):
-    # Pastikan product ada
-    product = mongo_service.find_one("inventory", {"product_id": product_id})
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-
     # Validasi file
     if file.content_type not in ALLOWED_MIMES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported file type")
@@ -177,19 +281,23 @@ async def upload_product_image(
     with open(out_path, "wb") as f:
         f.write(content)
 
-    # Hapus image lama jika ada (dan berada di folder yang diizinkan)
-    old_url: Optional[str] = product.get("image_url")
-    if old_url and old_url.startswith("/static/products/"):
-        try:
-            old_path = Path(old_url.lstrip("/")).resolve()
-            if old_path.is_file() and PRODUCT_IMAGE_DIR.resolve() in old_path.parents:
-                old_path.unlink(missing_ok=True)
-        except Exception:
-            pass
-
-    # Update DB
+    # Update DB dan ambil image_url lama dalam satu round trip
     image_url = f"/static/products/{filename}"
-    mongo_service.update_one("inventory", {"product_id": product_id}, {"image_url": image_url})
+    product = mongo_service.find_one_and_update(
+        "inventory",
+        {"product_id": product_id, **NOT_DELETED},
+        {"image_url": image_url},
+        projection={"_id": 0, "image_url": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if product is None:
+        out_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+    catalog.apply_local(product_id, {"image_url": image_url})
+    # Hapus image lama di background job
+    enqueue_file_cleanup(product.get("image_url"), PRODUCT_IMAGE_DIR)
+
     return {"image_url": image_url}
 
 @router.delete("/api/v1/{product_id}/image", status_code=status.HTTP_204_NO_CONTENT)
@@ -197,18 +305,16 @@ def delete_product_image(
     product_id: str,
     _=Depends(require_roles(["admin"])),
 ):
-    product = mongo_service.find_one("inventory", {"product_id": product_id})
-    if not product:
+    product = mongo_service.find_one_and_update(
+        "inventory",
+        {"product_id": product_id, **NOT_DELETED},
+        {"image_url": None},
+        projection={"_id": 0, "image_url": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
-    image_url: Optional[str] = product.get("image_url")
-    if image_url and image_url.startswith("/static/products/"):
-        try:
-            p = Path(image_url.lstrip("/")).resolve()
-            if p.is_file() and PRODUCT_IMAGE_DIR.resolve() in p.parents:
-                p.unlink(missing_ok=True)
-        except Exception:
-            pass
-
-    mongo_service.update_one("inventory", {"product_id": product_id}, {"image_url": None})
+    catalog.apply_local(product_id, {"image_url": None})
+    enqueue_file_cleanup(product.get("image_url"), PRODUCT_IMAGE_DIR)
     return None
\ No newline at end of file
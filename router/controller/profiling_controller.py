@@ -0,0 +1,20 @@
+import os
+from fastapi import APIRouter, Depends, status
+from router import router_param_builder
+from utils.auth import require_roles
+from utils.profiling import slow_requests
+
+tag = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
+router = APIRouter(**router_param_builder(tag))
+
+
+@router.get("/api/v1/slow-requests")
+def get_slow_requests(_=Depends(require_roles(["admin"]))):
+    data = slow_requests.list()
+    return {"data": data, "total": len(data)}
+
+
+@router.delete("/api/v1/slow-requests", status_code=status.HTTP_204_NO_CONTENT)
+def clear_slow_requests(_=Depends(require_roles(["admin"]))):
+    slow_requests.clear()
+    return None
@@ -0,0 +1,65 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Optional
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from router import router_param_builder
+from utils.product_stream import product_stream
+
+HEARTBEAT_SECONDS = 15
+
+tag = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
+router = APIRouter(**router_param_builder(tag))
+
+logger = logging.getLogger(__name__)
+
+
+@router.get("/api/v1/products/events")
+async def product_events_sse(
+    request: Request,
+    category: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+):
+    sub = product_stream.subscribe(category=category, status=status)
+
+    async def event_source():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Komentar SSE sebagai keep-alive untuk proxy
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            product_stream.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/api/v1/products/ws")
+async def product_events_ws(
+    websocket: WebSocket,
+    category: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+):
+    await websocket.accept()
+    sub = product_stream.subscribe(category=category, status=status)
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                event = {"type": "ping", "product_id": None, "data": None}
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        product_stream.unsubscribe(sub)
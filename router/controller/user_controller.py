@@ -5,7 +5,8 @@ import re
 from fastapi import APIRouter, Query, HTTPException, status, Depends, UploadFile, File
 from router import router_param_builder
 from utils.auth import get_current_user, require_roles
-from utils.helper import ensure_exists, _is_admin
+from datetime import datetime
+from utils.helper import ensure_exists, _is_admin, order_by_ids, NOT_DELETED
 from router.dto.user import (
     UserRegister,
     UserRegisterResponse,
@@ -13,12 +14,16 @@ from router.dto.user import (
     UserFilters,
     UsersListResponse,
     UserResponse,
+    UserBatchRequest,
+    UserBatchResponse,
 )
 from db import mongo_service
-from utils.pagination import Pagination
+from utils.pagination import Pagination, PaginationInfo
+from utils.serialization import ListPageEncoder
+from utils.jobs import enqueue_file_cleanup
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError, BulkWriteError, PyMongoError
 from fastapi.security import OAuth2PasswordRequestForm
-from typing import Optional
 import secrets
 from pathlib import Path
 
@@ -27,6 +32,7 @@ MAX_BYTES = 2 * 1024 * 1024  # 2 MB
 AVATAR_DIR = Path("static") / "avatars"
 
 pagination = Pagination()
+users_encoder = ListPageEncoder(UsersListResponse, UserResponse, PaginationInfo)
 
 tag = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
 router = APIRouter(**router_param_builder(tag))
@@ -40,7 +46,7 @@ def get_all_users(
     size: int = Query(10, ge=1, le=200),
     filters: UserFilters = Depends(),
 ):
-    query = {}
+    query = dict(NOT_DELETED)
     if filters.name:
         pattern = re.escape(filters.name)
         query["name"] = {"$regex": pattern, "$options": "i"}
@@ -58,15 +64,23 @@ def get_all_users(
     user_items = mongo_service.find_many(
         "users", query, paging.get("offset"), paging.get("limit")
     )
-    paging_info = pagination.get_pagination_info(
-        str(total_data), [], str(size), str(page)
+    paging_info = pagination.get_pagination_info(total_data, [], size, page)
+    return users_encoder.response(user_items, paging_info)
+
+
+@router.post("/api/v1/users/batch", response_model=UserBatchResponse)
+def get_users_by_ids(payload: UserBatchRequest, _=Depends(require_roles(["admin"]))):
+    ids = list(dict.fromkeys(payload.ids))
+    users = mongo_service.find_many(
+        "users", {"user_id": {"$in": ids}, **NOT_DELETED}, limit=len(ids)
     )
-    return {"data": user_items, "pagination_info": paging_info}
+    found, missing = order_by_ids(users, "user_id", ids)
+    return {"data": found, "missing": missing}
 
 
 @router.get("/api/v1/{user_id}")
 def get_user_by_id(user_id: str):
-    user = mongo_service.find_one("users", {"user_id": user_id})
+    user = mongo_service.find_one("users", {"user_id": user_id, **NOT_DELETED})
     return ensure_exists(user, "User")
 
 
@@ -77,34 +91,29 @@ def update_user(user_id: str, payload: UserUpdate):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update"
         )
-    res = mongo_service.update_one("users", {"user_id": user_id}, update)
-    if res.matched_count == 0:
+    user = mongo_service.find_one_and_update(
+        "users",
+        {"user_id": user_id, **NOT_DELETED},
+        update,
+        projection={"_id": 0, "password": 0},
+    )
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    user = mongo_service.find_one("users", {"user_id": user_id})
     return user
 
 
 @router.delete("/api/v1/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(user_id: str, _=Depends(require_roles(["admin"]))):
-    # Bersihkan avatar file jika ada
-    user = mongo_service.find_one("users", {"user_id": user_id})
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-        )
-    avatar_url: Optional[str] = user.get("avatar_url")
-    if avatar_url and avatar_url.startswith("/static/avatars/"):
-        try:
-            p = Path(avatar_url.lstrip("/")).resolve()
-            if p.is_file() and AVATAR_DIR.resolve() in p.parents:
-                p.unlink(missing_ok=True)
-        except Exception:
-            pass
-
-    res = mongo_service.delete_one("users", {"user_id": user_id})
-    if res.deleted_count == 0:
+    # Soft delete: avatar dibersihkan oleh archiver setelah masa retensi
+    user = mongo_service.find_one_and_update(
+        "users",
+        {"user_id": user_id, **NOT_DELETED},
+        {"is_deleted": True, "deleted_at": datetime.now()},
+        projection={"_id": 0, "user_id": 1},
+    )
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
@@ -138,25 +147,21 @@ async def upload_avatar(
     with open(out_path, "wb") as f:
         f.write(content)
 
-    # Remove old avatar if exists (and is inside our avatar dir)
-    user = mongo_service.find_one("users", {"user_id": user_id})
-    old_url: Optional[str] = user.get("avatar_url") if user else None
-    if old_url and old_url.startswith("/static/avatars/"):
-        try:
-            old_path = Path(old_url.lstrip("/"))
-            if (
-                old_path.is_file()
-                and old_path.resolve().is_file()
-                and AVATAR_DIR.resolve() in old_path.resolve().parents
-            ):
-                old_path.unlink(
-                    missing_ok=True
-                )  # Python 3.8+: use try/except if missing_ok unsupported
-        except Exception:
-            pass
-
+    # Update DB and fetch the previous avatar_url in one round trip
     avatar_url = f"/static/avatars/{filename}"
-    mongo_service.update_one("users", {"user_id": user_id}, {"avatar_url": avatar_url})
+    user = mongo_service.find_one_and_update(
+        "users",
+        {"user_id": user_id, **NOT_DELETED},
+        {"avatar_url": avatar_url},
+        projection={"_id": 0, "avatar_url": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if user is None:
+        out_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Remove the old avatar in a background job
+    enqueue_file_cleanup(user.get("avatar_url"), AVATAR_DIR)
 
     return {"avatar_url": avatar_url}
 
@@ -169,18 +174,15 @@ def delete_avatar(
     if (current_user.get("user_id") != user_id) and (not _is_admin(current_user)):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
-    user = mongo_service.find_one("users", {"user_id": user_id})
-    if not user:
+    user = mongo_service.find_one_and_update(
+        "users",
+        {"user_id": user_id, **NOT_DELETED},
+        {"avatar_url": None},
+        projection={"_id": 0, "avatar_url": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    avatar_url = user.get("avatar_url")
-    if avatar_url and avatar_url.startswith("/static/avatars/"):
-        try:
-            p = Path(avatar_url.lstrip("/"))
-            if p.is_file() and AVATAR_DIR.resolve() in p.resolve().parents:
-                p.unlink(missing_ok=True)
-        except Exception:
-            pass
-
-    mongo_service.update_one("users", {"user_id": user_id}, {"avatar_url": None})
+    enqueue_file_cleanup(user.get("avatar_url"), AVATAR_DIR)
     return None
@@ -0,0 +1,37 @@
+from datetime import datetime
+from fastapi import Query
+from pydantic import BaseModel
+from typing import Optional, List
+from utils.pagination import PaginationInfo
+
+
+class JobFilters:
+    def __init__(
+        self,
+        status: Optional[str] = Query(None, pattern=r"^(queued|running|succeeded|failed)$"),
+        type: Optional[str] = Query(None),
+    ):
+        self.status = status
+        self.type = type
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    type: str
+    payload: dict = {}
+    status: str
+    attempts: int = 0
+    max_attempts: int = 0
+    run_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    node: Optional[str] = None
+    worker: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class JobsListResponse(BaseModel):
+    data: List[JobResponse]
+    pagination_info: PaginationInfo
@@ -2,6 +2,9 @@ from datetime import datetime
 from fastapi import Query
 from pydantic import BaseModel, Field
 from typing import Optional, List
+from utils.pagination import PaginationInfo
+
+MAX_BATCH_IDS = 300
 
 
 class Product(BaseModel):
@@ -43,9 +46,25 @@ class ProductFilters:
         self,
         name: Optional[str] = Query(None),
         status: Optional[str] = Query(None),
+        category: Optional[str] = Query(None),
+        min_price: Optional[float] = Query(None, ge=0),
+        max_price: Optional[float] = Query(None, ge=0),
+        min_stock: Optional[int] = Query(None, ge=0),
+        max_stock: Optional[int] = Query(None, ge=0),
+        low_stock_only: bool = Query(False),
+        sort: Optional[str] = Query(
+            None, pattern=r"^-?(name|unit_price|stock|created_at)$"
+        ),
     ):
         self.name = name
         self.status = status
+        self.category = category
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_stock = min_stock
+        self.max_stock = max_stock
+        self.low_stock_only = low_stock_only
+        self.sort = sort
 
 class ProductResponse(BaseModel):
     product_id: Optional[str] = None
@@ -56,6 +75,7 @@ class ProductResponse(BaseModel):
     unit_price: Optional[float] = None
     low_stock: Optional[int] = None
     image_url: Optional[str] = None
+    is_low_stock: Optional[bool] = None
     created_at: Optional[datetime] = Field(None, alias="created_at")
     updated_at: Optional[datetime] = Field(None, alias="updated_at")
     status: Optional[str] = None
@@ -63,7 +83,7 @@ class ProductResponse(BaseModel):
 
 class ProductsListResponse(BaseModel):
     data: List[ProductResponse]
-    pagination_info: dict
+    pagination_info: PaginationInfo
 
 
 class ProductBulkCreate(BaseModel):
@@ -71,5 +91,31 @@ class ProductBulkCreate(BaseModel):
     status: int
 
 
+class ProductBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class ProductBatchResponse(BaseModel):
+    data: List[ProductResponse]
+    missing: List[str]
+
+
+class SummaryMetrics(BaseModel):
+    count: int = 0
+    total_stock: int = 0
+    stock_value: float = 0
+    low_stock_count: int = 0
+
+
+class SummaryBucket(SummaryMetrics):
+    value: Optional[str] = None
+
+
+class InventorySummaryResponse(BaseModel):
+    total: SummaryMetrics
+    category: List[SummaryBucket]
+    status: List[SummaryBucket]
+
+
 class Config:
     allow_population_by_field_name = True
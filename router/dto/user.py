@@ -2,6 +2,9 @@ from datetime import datetime
 from fastapi import Query
 from pydantic import BaseModel, Field
 from typing import Optional, List
+from utils.pagination import PaginationInfo
+
+MAX_BATCH_IDS = 300
 
 
 class User(BaseModel):
@@ -73,7 +76,16 @@ class UserResponse(BaseModel):
 
 class UsersListResponse(BaseModel):
     data: List[UserResponse]
-    pagination_info: dict
+    pagination_info: PaginationInfo
+
+
+class UserBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class UserBatchResponse(BaseModel):
+    data: List[UserResponse]
+    missing: List[str]
 
 
 class UserRegisterResponse(BaseModel):
@@ -0,0 +1,83 @@
+"""
+Production runner: N worker uvicorn (uvloop + httptools) dengan profile yang di-tune.
+
+    python serve.py                         # profile io, worker = jumlah core
+    python serve.py --profile cpu --workers 8 --port 8000
+
+Setiap worker adalah proses baru (spawn) yang meng-import `main` sendiri, sehingga
+client Mongo, threadpool dan state lain dibuat di dalam worker (lewat lifespan),
+bukan diwarisi dari parent. SIGTERM: /ready langsung 503, setelah SHUTDOWN_PRESTOP_SECONDS
+uvicorn berhenti menerima koneksi baru, menunggu request berjalan hingga SHUTDOWN_GRACE_SECONDS,
+lalu menjalankan shutdown lifespan.
+"""
+import argparse
+import importlib.util
+import os
+
+# Nilai default per profile; env yang sudah diset (mis. dari .env/orchestrator) tetap menang.
+PROFILES = {
+    # Mayoritas waktu menunggu Mongo/disk: threadpool besar agar handler sync tidak antre,
+    # admission control longgar
+    "io": {
+        "THREADPOOL_SIZE": "100",
+        "MAX_CONCURRENT_REQUESTS": "256",
+        "MAX_QUEUED_REQUESTS": "512",
+        "MONGODB_MIN_POOL_SIZE": "10",
+    },
+    # Dominan bcrypt/serialisasi: thread tambahan hanya berebut GIL, jadi threadpool kecil
+    # dan antrean pendek supaya overload cepat di-shed
+    "cpu": {
+        "THREADPOOL_SIZE": "8",
+        "MAX_CONCURRENT_REQUESTS": "32",
+        "MAX_QUEUED_REQUESTS": "64",
+        "MONGODB_MIN_POOL_SIZE": "4",
+    },
+}
+
+
+def default_workers() -> int:
+    # Hormati batas CPU container/affinity jika ada
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return int(os.getenv("WEB_CONCURRENCY") or max(cores, 1))
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--profile", choices=list(PROFILES), default=os.getenv("SERVER_PROFILE", "io"))
+    args = parser.parse_args()
+
+    # Diset sebelum worker di-spawn agar settings di tiap worker membaca nilai yang sama
+    for key, value in PROFILES[args.profile].items():
+        os.environ.setdefault(key, value)
+
+    import uvicorn
+    from settings import settings
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=event_loop(),
+        http="httptools",
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        backlog=2048,
+        timeout_keep_alive=5,
+        timeout_graceful_shutdown=settings.shutdown_grace_seconds,
+        access_log=False,  # RequestLoggingMiddleware sudah mencatat setiap request
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,54 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     mongodb_uri: str
+    mongodb_db: str = "product-management"
+    mongodb_min_pool_size: int = 4
     jwt_secret_key: str | None = None
     jwt_algorithm: str 
     access_token_expire_minutes: int 
     LOG_LEVEL: str
+    # Profiling per request (lihat utils/profiling.py)
+    profiling_sample_rate: float = 0.0
+    profiling_header_enabled: bool = False
+    slow_request_ms: int = 1000
+    profiling_ring_size: int = 50
+    # Rate limiting dan admission control (lihat utils/rate_limit.py)
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # "memory" | "mongo"
+    max_concurrent_requests: int = 64
+    max_queued_requests: int = 128
+    queue_timeout_seconds: float = 2.0
+    idempotency_ttl_hours: int = 24
+    idempotency_lock_seconds: int = 60
+    # Production runner (lihat serve.py)
+    threadpool_size: int = 40
+    shutdown_grace_seconds: int = 30
+    # Jeda antara SIGTERM (/ready jadi 503) dan berhenti menerima koneksi, agar load balancer sempat melepas node
+    shutdown_prestop_seconds: float = 5.0
+    # Soft delete & archival (lihat utils/archiver.py)
+    archiver_enabled: bool = True
+    archive_interval_seconds: int = 3600
+    archive_batch_size: int = 500
+    archive_deleted_after_days: int = 30
+    archive_inactive_after_days: int = 180
+    archive_retention_days: int = 365
+    # Background job queue (lihat utils/jobs.py)
+    jobs_enabled: bool = True
+    job_concurrency: int = 2
+    job_max_attempts: int = 5
+    job_backoff_seconds: float = 2.0
+    job_backoff_max_seconds: float = 600.0
+    job_poll_seconds: float = 5.0
+    job_lease_seconds: int = 300
+    job_retention_days: int = 7
+    # static/ di disk lokal: job file cleanup hanya diambil node yang menulis file (lihat utils/jobs.py).
+    # Set true jika static/ ada di shared storage (NFS, volume bersama) agar node mana pun bisa.
+    static_shared_storage: bool = False
+    # Read replica in-process untuk katalog produk (lihat utils/catalog.py)
+    catalog_snapshot_enabled: bool = False
+    catalog_refresh_seconds: int = 60
+    # List response lewat model_construct tanpa validasi (lihat utils/serialization.py)
+    trusted_db_serialization: bool = False
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
     
@@ -0,0 +1,96 @@
+"""
+Fixture bersama. Test jalan tanpa mongod: mongo_service diarahkan ke mongomock baru di
+setiap test, dan app dipakai lewat TestClient tanpa lifespan (router sudah ada sejak import).
+"""
+import os
+
+# Diset sebelum settings di-import; nilai dari environment tetap menang
+for _key, _value in {
+    "MONGODB_URI": "mongodb://localhost:27017",
+    "MONGODB_DB": "product-management-test",
+    "JWT_SECRET_KEY": "test-secret",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "LOG_LEVEL": "WARNING",
+    "RATE_LIMIT_ENABLED": "false",
+    "RATE_LIMIT_BACKEND": "memory",
+    "ARCHIVER_ENABLED": "false",
+    "JOBS_ENABLED": "false",
+    "CATALOG_SNAPSHOT_ENABLED": "false",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.mongo_standin import use_in_memory_mongo
+from db import mongo_service
+from utils.auth import create_access_token, get_password_hash, token_blacklist
+from utils.catalog import catalog
+from utils.rate_limit import MemoryRateLimitBackend, rate_limiter
+
+PASSWORD = "secret-password"
+# Hash sekali saja: bcrypt lambat sengaja
+PASSWORD_HASH = get_password_hash(PASSWORD)
+
+
+@pytest.fixture(autouse=True)
+def db():
+    use_in_memory_mongo()
+    if isinstance(rate_limiter, MemoryRateLimitBackend):
+        rate_limiter._buckets.clear()
+    token_blacklist.clear()
+    catalog.ready = False
+    yield mongo_service.db
+    catalog.ready = False
+
+
+@pytest.fixture
+def client():
+    import main
+
+    return TestClient(main.app)
+
+
+def make_user(email: str, roles=("user",), legacy: bool = False, deleted: bool = False) -> dict:
+    """Insert user langsung; `legacy` = dokumen dari sebelum soft delete (tanpa is_deleted)."""
+    doc = {
+        "user_id": str(uuid.uuid4()),
+        "name": email.split("@")[0],
+        "email": email,
+        "status": "active",
+        "roles": list(roles),
+        "password": PASSWORD_HASH,
+    }
+    if not legacy:
+        doc["is_deleted"] = deleted
+        doc["deleted_at"] = None
+    mongo_service.insert_one("users", doc)
+    return doc
+
+
+def make_product(name: str = "Kopi", legacy: bool = False, deleted: bool = False, **fields) -> dict:
+    doc = {
+        "product_id": str(uuid.uuid4()),
+        "name": name,
+        "category": "drinks",
+        "description": "test",
+        "stock": 10,
+        "low_stock": 5,
+        "is_low_stock": False,
+        "unit_price": 12.5,
+        "status": "active",
+        **fields,
+    }
+    if not legacy:
+        doc["is_deleted"] = deleted
+        doc["deleted_at"] = None
+    mongo_service.insert_one("inventory", doc)
+    return doc
+
+
+def auth_headers(user: dict) -> dict:
+    token = create_access_token({"sub": user["user_id"], "roles": user["roles"]})
+    return {"Authorization": f"Bearer {token}"}
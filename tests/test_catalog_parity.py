@@ -0,0 +1,11 @@
+from benchmarks import catalog_parity
+from benchmarks.seed import seed
+
+
+def test_catalog_snapshot_matches_mongo_path():
+    seed(500, 1, batch_size=250, drop=True)
+
+    report = catalog_parity.run(cases=40, mutations=20, seed=1)
+
+    mismatches = {phase: result["mismatches"] for phase, result in report["results"].items()}
+    assert mismatches == {"loaded": 0, "after_mutations": 0}, report["results"]
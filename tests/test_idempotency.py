@@ -0,0 +1,48 @@
+from db import mongo_service
+from utils import idempotency
+
+PRODUCTS = "/product/controller/api/v1/products"
+ITEM = {"name": "Kopi", "category": "drinks", "description": "d", "stock": 3, "unit_price": 9.5, "low_stock": 1}
+
+
+def test_retry_with_same_key_replays_stored_response(client):
+    headers = {"Idempotency-Key": "create-1"}
+
+    first = client.post(PRODUCTS, json=[ITEM], headers=headers)
+    second = client.post(PRODUCTS, json=[ITEM], headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json() == first.json()
+    assert mongo_service.db["inventory"].count_documents({}) == 1
+
+
+def test_same_key_with_different_body_is_rejected(client):
+    headers = {"Idempotency-Key": "create-2"}
+
+    client.post(PRODUCTS, json=[ITEM], headers=headers)
+    response = client.post(PRODUCTS, json=[{**ITEM, "stock": 4}], headers=headers)
+
+    assert response.status_code == 422
+    assert mongo_service.db["inventory"].count_documents({}) == 1
+
+
+def test_key_in_progress_returns_conflict(client):
+    key = idempotency.record_key("busy", "POST", PRODUCTS, None)
+    body = b'[{"name": "Kopi"}]'
+    assert idempotency.reserve(key, idempotency.fingerprint(body)) is None
+
+    response = client.post(
+        PRODUCTS, content=body, headers={"Idempotency-Key": "busy", "Content-Type": "application/json"}
+    )
+    assert response.status_code == 409
+
+
+def test_multipart_fingerprint_ignores_boundary():
+    def form(boundary):
+        body = f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"\r\n\r\nabc\r\n--{boundary}--\r\n"
+        return body.encode(), f"multipart/form-data; boundary={boundary}"
+
+    assert idempotency.fingerprint(*form("aaa111")) == idempotency.fingerprint(*form("bbb222"))
+    assert idempotency.fingerprint(b"a", "application/json") != idempotency.fingerprint(b"b", "application/json")
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from db import mongo_service
+from utils import jobs
+
+
+def _enqueue(**kwargs) -> str:
+    return jobs.enqueue("delete_static_file", {"url": None, "base_dir": "static/products"}, **kwargs)
+
+
+def _stored(job_id: str) -> dict:
+    return mongo_service.db[jobs.JOBS_COLLECTION].find_one({"job_id": job_id})
+
+
+def test_claim_leases_job_once():
+    job_id = _enqueue()
+
+    job = jobs.claim_next()
+
+    assert job["job_id"] == job_id
+    assert job["status"] == jobs.RUNNING
+    assert job["attempts"] == 1
+    assert _stored(job_id)["status"] == jobs.RUNNING
+    # Lease masih berlaku: worker lain tidak mendapat job yang sama
+    assert jobs.claim_next() is None
+
+
+def test_expired_lease_is_claimed_again():
+    job_id = _enqueue()
+    first = jobs.claim_next()
+    mongo_service.db[jobs.JOBS_COLLECTION].update_one(
+        {"job_id": job_id}, {"$set": {"locked_until": datetime.now(timezone.utc) - timedelta(seconds=1)}}
+    )
+
+    second = jobs.claim_next()
+
+    assert second["job_id"] == job_id
+    assert second["attempts"] == 2
+    # Worker lama tidak boleh menimpa status setelah lease diambil alih
+    jobs.mark_succeeded({**first, "worker": "dead-host:1"})
+    assert _stored(job_id)["status"] == jobs.RUNNING
+
+
+def test_failed_attempt_is_retried_later_with_backoff():
+    job_id = _enqueue()
+    job = jobs.claim_next()
+
+    jobs.mark_failed(job, "boom")
+
+    stored = _stored(job_id)
+    assert stored["status"] == jobs.QUEUED
+    assert stored["last_error"] == "boom"
+    assert stored["run_at"] > datetime.now(timezone.utc).replace(tzinfo=None)
+    assert jobs.claim_next() is None
+
+
+def test_job_fails_after_max_attempts_and_can_be_retried():
+    job_id = _enqueue(max_attempts=1)
+    jobs.mark_failed(jobs.claim_next(), "boom")
+
+    stored = _stored(job_id)
+    assert stored["status"] == jobs.FAILED
+    assert stored["expires_at"] is not None
+
+    requeued = jobs.retry(job_id)
+    assert requeued["status"] == jobs.QUEUED
+    assert requeued["attempts"] == 0
+    assert jobs.claim_next()["job_id"] == job_id
+
+
+def test_job_pinned_to_other_node_is_not_claimed():
+    _enqueue(node="other-node")
+    assert jobs.claim_next() is None
+
+    own = _enqueue(node=jobs._node_id())
+    assert jobs.claim_next()["job_id"] == own
+
+
+def test_file_cleanup_is_pinned_to_this_node(monkeypatch):
+    from settings import settings
+
+    jobs.enqueue_file_cleanup("/static/products/a.png", Path("static/products"))
+    monkeypatch.setattr(settings, "static_shared_storage", True)
+    jobs.enqueue_file_cleanup("/static/products/b.png", Path("static/products"))
+
+    nodes = {doc["payload"]["url"]: doc["node"] for doc in mongo_service.db[jobs.JOBS_COLLECTION].find()}
+    assert nodes == {"/static/products/a.png": jobs._node_id(), "/static/products/b.png": None}
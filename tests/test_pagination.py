@@ -0,0 +1,22 @@
+from conftest import make_product
+from utils.pagination import Pagination
+
+
+def test_pagination_info_is_numeric():
+    info = Pagination().get_pagination_info(101, [], 50, 3)
+
+    assert info == {"size": 50, "totalElements": 101, "totalPages": 3, "currentPage": 3}
+
+
+def test_pagination_info_for_empty_result():
+    assert Pagination().get_pagination_info(0, [], 10, 1)["totalPages"] == 0
+
+
+def test_list_response_sends_numbers(client):
+    for i in range(3):
+        make_product(f"Produk {i}")
+
+    body = client.get("/product/controller/api/v1/products", params={"page": 2, "size": 2}).json()
+
+    assert body["pagination_info"] == {"size": 2, "totalElements": 3, "totalPages": 2, "currentPage": 2}
+    assert len(body["data"]) == 1
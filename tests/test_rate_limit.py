@@ -0,0 +1,55 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+
+from settings import settings
+from utils.rate_limit import LOGIN_ACCOUNT_BURST, MemoryRateLimitBackend, MongoRateLimitBackend
+
+
+@pytest.mark.parametrize("backend", [MemoryRateLimitBackend, MongoRateLimitBackend])
+def test_bucket_allows_burst_then_rejects(backend):
+    limiter = backend()
+
+    results = [limiter.hit("ip:1.2.3.4", rate=1, burst=3) for _ in range(4)]
+
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert 0 < results[-1][1] <= 1
+
+
+@pytest.mark.parametrize("backend", [MemoryRateLimitBackend, MongoRateLimitBackend])
+def test_buckets_are_independent_per_key(backend):
+    limiter = backend()
+
+    assert limiter.hit("a", rate=1, burst=1)[0]
+    assert not limiter.hit("a", rate=1, burst=1)[0]
+    assert limiter.hit("b", rate=1, burst=1)[0]
+
+
+def test_memory_bucket_refills_over_time(monkeypatch):
+    import utils.rate_limit as rate_limit
+
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    limiter = MemoryRateLimitBackend()
+    assert limiter.hit("k", rate=2, burst=1)[0]
+    assert not limiter.hit("k", rate=2, burst=1)[0]
+
+    now[0] += 0.5
+    assert limiter.hit("k", rate=2, burst=1)[0]
+
+
+def test_login_account_bucket_is_keyed_on_email(monkeypatch):
+    from router.controller.auth_controller import login
+
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    codes = []
+    for i in range(LOGIN_ACCOUNT_BURST + 1):
+        # Email dinormalisasi: variasi huruf besar/spasi tetap satu bucket
+        username = "Victim@Example.com " if i % 2 else "victim@example.com"
+        with pytest.raises(HTTPException) as exc:
+            login(OAuth2PasswordRequestForm(username=username, password="wrong"))
+        codes.append(exc.value.status_code)
+
+    assert codes[:-1] == [401] * LOGIN_ACCOUNT_BURST
+    assert codes[-1] == 429
+    assert "Retry-After" in exc.value.headers
@@ -0,0 +1,54 @@
+from conftest import PASSWORD, auth_headers, make_product, make_user
+
+AUTH = "/auth/controller/api/v1"
+PRODUCT = "/product/controller/api/v1"
+
+
+def _login(client, email):
+    return client.post(f"{AUTH}/login", data={"username": email, "password": PASSWORD})
+
+
+def test_legacy_user_without_is_deleted_can_log_in(client):
+    make_user("old@example.com", legacy=True)
+
+    response = _login(client, "old@example.com")
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    me = client.get(f"{AUTH}/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.status_code == 200
+    assert me.json()["email"] == "old@example.com"
+
+
+def test_soft_deleted_user_cannot_log_in(client):
+    make_user("gone@example.com", deleted=True)
+
+    assert _login(client, "gone@example.com").status_code == 401
+
+
+def test_register_rejects_email_of_legacy_user(client):
+    make_user("old@example.com", legacy=True)
+
+    response = client.post(
+        f"{AUTH}/register", json={"name": "dup", "email": "old@example.com", "password": "x"}
+    )
+    assert response.status_code == 409
+
+
+def test_legacy_product_is_readable_and_listed(client):
+    product = make_product("Teh lama", legacy=True)
+
+    assert client.get(f"{PRODUCT}/{product['product_id']}").status_code == 200
+    listed = client.get(f"{PRODUCT}/products").json()["data"]
+    assert [p["product_id"] for p in listed] == [product["product_id"]]
+
+
+def test_deleted_product_is_hidden_from_get_and_list(client):
+    admin = make_user("admin@example.com", roles=("admin",))
+    kept = make_product("Kopi")
+    removed = make_product("Teh")
+
+    response = client.delete(f"{PRODUCT}/{removed['product_id']}", headers=auth_headers(admin))
+    assert response.status_code == 204
+    assert client.get(f"{PRODUCT}/{removed['product_id']}").status_code == 404
+    listed = client.get(f"{PRODUCT}/products").json()["data"]
+    assert [p["product_id"] for p in listed] == [kept["product_id"]]
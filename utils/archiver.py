@@ -0,0 +1,135 @@
+import os
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+from db import mongo_service
+from settings import settings
+from utils.helper import NOT_DELETED, remove_static_file
+from utils import inventory_summary
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_ARCHIVE = "inventory_archive"
+USERS_ARCHIVE = "users_archive"
+ARCHIVE_COLLECTIONS = (INVENTORY_ARCHIVE, USERS_ARCHIVE)
+LOCKS_COLLECTION = "locks"
+PRODUCT_IMAGE_DIR = Path("static") / "products"
+AVATAR_DIR = Path("static") / "avatars"
+DUPLICATE_KEY = 11000
+
+
+def archive_batch(
+    collection_name: str,
+    archive_name: str,
+    query: dict,
+    on_archived: Callable[[List[dict]], None],
+) -> int:
+    """
+    Pindahkan satu batch dokumen dari `collection_name` ke `archive_name`.
+    Aman diulang: dokumen yang sudah ada di arsip (retry setelah crash) dilewati.
+    """
+    collection = mongo_service.db[collection_name]
+    archive = mongo_service.db[archive_name]
+    docs = list(collection.find(query).limit(settings.archive_batch_size))
+    if not docs:
+        return 0
+    # UTC-aware: TTL arsip membaca datetime naive sebagai UTC
+    now = datetime.now(timezone.utc)
+    for doc in docs:
+        doc["archived_at"] = now
+    try:
+        archive.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+            raise
+    ids = [doc["_id"] for doc in docs]
+    # Query diulang saat delete: dokumen yang berubah sejak dibaca (mis. diaktifkan lagi) tetap di hot collection
+    collection.delete_many({"_id": {"$in": ids}, **query})
+    kept = set(collection.distinct("_id", {"_id": {"$in": ids}}))
+    if kept:
+        archive.delete_many({"_id": {"$in": list(kept)}})
+    archived = [doc for doc in docs if doc["_id"] not in kept]
+    if archived:
+        on_archived(archived)
+    return len(archived)
+
+
+def _drain(collection_name: str, archive_name: str, query: dict, on_archived) -> int:
+    total = 0
+    while True:
+        moved = archive_batch(collection_name, archive_name, query, on_archived)
+        total += moved
+        if moved < settings.archive_batch_size:
+            return total
+
+
+def _cleanup_product_images(docs: List[dict]) -> None:
+    # Cleanup file yang ditunda dari delete_product
+    for doc in docs:
+        remove_static_file(doc.get("image_url"), PRODUCT_IMAGE_DIR)
+
+
+def _cleanup_avatars(docs: List[dict]) -> None:
+    for doc in docs:
+        remove_static_file(doc.get("avatar_url"), AVATAR_DIR)
+
+
+def run_archive_pass() -> dict:
+    now = datetime.now()
+    deleted_cutoff = now - timedelta(days=settings.archive_deleted_after_days)
+    inactive_cutoff = now - timedelta(days=settings.archive_inactive_after_days)
+    result = {
+        "deleted_products": _drain(
+            "inventory",
+            INVENTORY_ARCHIVE,
+            {"is_deleted": True, "deleted_at": {"$lt": deleted_cutoff}},
+            _cleanup_product_images,
+        ),
+        # Produk non-active masih dihitung di summary, jadi dikurangi saat diarsip
+        "inactive_products": _drain(
+            "inventory",
+            INVENTORY_ARCHIVE,
+            {**NOT_DELETED, "status": {"$ne": "active"}, "updated_at": {"$lt": inactive_cutoff}},
+            inventory_summary.record_removed,
+        ),
+        "deleted_users": _drain(
+            "users",
+            USERS_ARCHIVE,
+            {"is_deleted": True, "deleted_at": {"$lt": deleted_cutoff}},
+            _cleanup_avatars,
+        ),
+    }
+    if any(result.values()):
+        logger.info(f"Archive pass moved {result}")
+    return result
+
+
+def try_acquire_lease(name: str, seconds: int) -> bool:
+    # Hanya satu worker/node yang menjalankan archiver per interval
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    now = datetime.now()
+    try:
+        mongo_service.db[LOCKS_COLLECTION].find_one_and_update(
+            {"_id": name, "$or": [{"expires_at": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+async def archiver_loop() -> None:
+    interval = settings.archive_interval_seconds
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await run_in_threadpool(try_acquire_lease, "archiver", interval):
+                await run_in_threadpool(run_archive_pass)
+        except Exception as e:
+            logger.error(f"Archive pass failed: {e}")
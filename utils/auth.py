@@ -1,43 +1,87 @@
-from datetime import datetime, timedelta
+import hashlib
+from datetime import datetime, timedelta, timezone
 from fastapi import  HTTPException, status, Depends
 from typing import Optional, Set, Callable, List
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from jose.exceptions import ExpiredSignatureError
+from pymongo.errors import DuplicateKeyError
 from db import mongo_service
-from utils.helper import convert_object_id
-from settings import settings
+from utils.helper import convert_object_id, NOT_DELETED
+from utils.profiling import span
+from utils.tokens import JWT_SECRET, JWT_ALG, ACCESS_EXPIRE_MINUTES, token_subject
 
 # Auth setup
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/controller/api/v1/login")
-JWT_SECRET = settings.jwt_secret_key or "dev-secret-change-me"
-JWT_ALG = settings.jwt_algorithm
-ACCESS_EXPIRE_MINUTES = int(settings.access_token_expire_minutes)
 
-# Very simple in-memory blacklist for demo logout (stateless JWTs)
+REVOKED_TOKENS_COLLECTION = "revoked_tokens"
+# Cache lokal token yang sudah pasti di-revoke; sumber kebenaran ada di Mongo
+# agar logout berlaku di semua worker/proses
 token_blacklist: Set[str] = set()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("bcrypt"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with span("bcrypt"):
+        return pwd_context.hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_EXPIRE_MINUTES))
+    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     token = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALG)
     return token
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def revoke_token(token: str) -> None:
+    # Signature diverifikasi dulu: token palsu/rusak tidak boleh mengisi collection revoked_tokens
+    try:
+        exp = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG]).get("exp")
+    except ExpiredSignatureError:
+        # Token sudah tidak bisa dipakai, tidak ada yang perlu di-revoke
+        return
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    token_blacklist.add(token)
+    try:
+        mongo_service.insert_one(
+            REVOKED_TOKENS_COLLECTION,
+            {
+                "_id": _token_key(token),
+                # TTL: record dihapus setelah token memang sudah expired
+                "expires_at": datetime.fromtimestamp(exp, timezone.utc) if exp else datetime.now(timezone.utc) + timedelta(minutes=ACCESS_EXPIRE_MINUTES),
+            },
+        )
+    except DuplicateKeyError:
+        pass
+
+
+def is_token_revoked(token: str) -> bool:
+    """
+    Cek revocation per request terautentikasi. Hasil positif di-cache di proses; hasil negatif
+    tidak, jadi setiap request dengan token valid membayar satu find_one by _id ke `revoked_tokens`
+    (lookup index _id, ~1 round trip Mongo, di samping find_one `users` di get_current_user).
+    Ini yang membuat logout di satu worker langsung berlaku di semua worker.
+    """
     if token in token_blacklist:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+        return True
+    if mongo_service.find_one(REVOKED_TOKENS_COLLECTION, {"_id": _token_key(token)}) is None:
+        return False
+    token_blacklist.add(token)
+    return True
+
+
+def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
         user_id: str | None = payload.get("sub")
@@ -47,7 +91,9 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = mongo_service.find_one('users', {'user_id': user_id})
+    if is_token_revoked(token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+    user = mongo_service.find_one('users', {'user_id': user_id, **NOT_DELETED})
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     # Remove password before returning
@@ -0,0 +1,430 @@
+import sys
+import time
+import bisect
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from db import mongo_service
+from settings import settings
+from utils.helper import NOT_DELETED
+from utils.product_stream import product_stream
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_FIELDS = (
+    "product_id",
+    "name",
+    "category",
+    "description",
+    "stock",
+    "unit_price",
+    "low_stock",
+    "image_url",
+    "is_low_stock",
+    "status",
+    "created_at",
+    "updated_at",
+)
+SORT_FIELDS = ("name", "unit_price", "stock", "created_at")
+DEFAULT_SORT = "-created_at"
+MEMORY_SAMPLE = 1000
+# Lebih besar dari product_id mana pun, untuk batas atas bisect range
+MAX_ID = "\U0010ffff"
+
+
+class ProductRow:
+    # __slots__: tanpa __dict__ per objek, ~3x lebih hemat dari dict untuk 200k produk
+    __slots__ = PRODUCT_FIELDS + ("oid", "name_lower")
+
+    def __init__(self, doc: dict):
+        for f in PRODUCT_FIELDS:
+            setattr(self, f, doc.get(f))
+        # Nilai berulang (status/category) di-intern agar semua row berbagi satu string
+        if self.category is not None:
+            self.category = sys.intern(self.category)
+        if self.status is not None:
+            self.status = sys.intern(self.status)
+        self.oid = doc.get("_id")
+        self.name_lower = self.name.lower() if self.name else None
+
+    def to_dict(self) -> dict:
+        return {f: getattr(self, f) for f in PRODUCT_FIELDS}
+
+
+def _sort_key(row: ProductRow, field: str) -> tuple:
+    # Urutan sama dengan Mongo: null paling awal, tie-break product_id
+    value = getattr(row, field)
+    return (value is not None, value if value is not None else 0, row.product_id)
+
+
+class SortedIndex:
+    """List key terurut per field sort; insert/remove lewat bisect tanpa sort ulang."""
+
+    __slots__ = ("field", "keys")
+
+    def __init__(self, field: str, rows: Iterable[ProductRow] = ()):
+        self.field = field
+        self.keys = sorted(_sort_key(r, field) for r in rows)
+
+    def add(self, row: ProductRow) -> None:
+        bisect.insort(self.keys, _sort_key(row, self.field))
+
+    def remove(self, row: ProductRow) -> None:
+        key = _sort_key(row, self.field)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def product_ids(self, descending: bool) -> Iterable[str]:
+        keys = reversed(self.keys) if descending else self.keys
+        return (k[2] for k in keys)
+
+
+class CatalogIndex:
+    """Row produk aktif + index turunan. Dibangun penuh saat load, lalu diubah per event."""
+
+    def __init__(self, docs: Iterable[dict] = ()):
+        self.by_id: Dict[str, ProductRow] = {}
+        self.by_oid: Dict[object, str] = {}
+        self.by_status: Dict[str, Set[str]] = {}
+        self.by_category: Dict[str, Set[str]] = {}
+        for doc in docs:
+            self._add_to_maps(ProductRow(doc))
+        self.sorted: Dict[str, SortedIndex] = {
+            f: SortedIndex(f, self.by_id.values()) for f in SORT_FIELDS
+        }
+
+    def _add_to_maps(self, row: ProductRow) -> None:
+        self.by_id[row.product_id] = row
+        if row.oid is not None:
+            self.by_oid[row.oid] = row.product_id
+        self.by_status.setdefault(row.status, set()).add(row.product_id)
+        self.by_category.setdefault(row.category, set()).add(row.product_id)
+
+    def add(self, row: ProductRow) -> None:
+        self._add_to_maps(row)
+        for index in self.sorted.values():
+            index.add(row)
+
+    def remove(self, product_id: str) -> Optional[ProductRow]:
+        row = self.by_id.pop(product_id, None)
+        if row is None:
+            return None
+        self.by_oid.pop(row.oid, None)
+        for facet, value in ((self.by_status, row.status), (self.by_category, row.category)):
+            ids = facet.get(value)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del facet[value]
+        for index in self.sorted.values():
+            index.remove(row)
+        return row
+
+    def upsert(self, doc: dict) -> None:
+        old = self.remove(doc["product_id"])
+        if old is not None:
+            # Update lokal bisa berupa sebagian field; sisanya dari row lama
+            doc = {**old.to_dict(), "_id": old.oid, **doc}
+        if doc.get("is_deleted"):
+            return
+        self.add(ProductRow(doc))
+
+
+def _range_filters(filters) -> List[Tuple[str, Optional[float], Optional[float]]]:
+    return [
+        (field, low, high)
+        for field, low, high in (
+            ("unit_price", filters.min_price, filters.max_price),
+            ("stock", filters.min_stock, filters.max_stock),
+        )
+        if low is not None or high is not None
+    ]
+
+
+def _filter_rows(rows: Iterable[ProductRow], filters, ranges) -> List[ProductRow]:
+    # Satu comprehension per kondisi (tanpa function call per row); filter paling murah dulu
+    if filters.status:
+        rows = [r for r in rows if r.status == filters.status]
+    if filters.category:
+        rows = [r for r in rows if r.category == filters.category]
+    if filters.low_stock_only:
+        rows = [r for r in rows if r.is_low_stock]
+    for field, low, high in ranges:
+        if low is not None:
+            rows = [r for r in rows if getattr(r, field) is not None and getattr(r, field) >= low]
+        if high is not None:
+            rows = [r for r in rows if getattr(r, field) is not None and getattr(r, field) <= high]
+    if filters.name:
+        # Sama dengan $regex escaped + $options "i": substring case-insensitive
+        needle = filters.name.lower()
+        rows = [r for r in rows if r.name_lower is not None and needle in r.name_lower]
+    return rows if isinstance(rows, list) else list(rows)
+
+
+def _sample_size(objs: list, deep) -> int:
+    # Estimasi dari sampel agar laporan memori tetap murah untuk 200k row
+    if not objs:
+        return 0
+    step = max(1, len(objs) // MEMORY_SAMPLE)
+    sample = objs[::step]
+    return int(sum(deep(o) for o in sample) / len(sample) * len(objs))
+
+
+def _row_size(row: ProductRow) -> int:
+    size = sys.getsizeof(row)
+    for slot in ProductRow.__slots__:
+        value = getattr(row, slot)
+        # String category/status di-intern dan dipakai bersama, tidak dihitung per row
+        if slot not in ("category", "status") and value is not None and not isinstance(value, bool):
+            size += sys.getsizeof(value)
+    return size
+
+
+def _as_stored(doc: dict) -> dict:
+    # BSON datetime presisi milidetik: samakan dengan nilai yang akan dibaca dari Mongo (urutan sort ikut sama)
+    return {
+        k: v.replace(microsecond=v.microsecond // 1000 * 1000) if isinstance(v, datetime) else v
+        for k, v in doc.items()
+    }
+
+
+class CatalogSnapshot:
+    """
+    Read replica in-process untuk `inventory`: seluruh produk aktif di memori,
+    diperbarui lewat change stream milik product_stream (satu cursor per proses).
+    Tanpa replica set (change stream tidak tersedia) snapshot di-reload penuh
+    paling sering setiap CATALOG_REFRESH_SECONDS, saat watcher mencoba ulang.
+    """
+
+    def __init__(self, collection_name: str = "inventory"):
+        self.collection_name = collection_name
+        self._index = CatalogIndex()
+        self._lock = threading.RLock()
+        self._started = False
+        self.ready = False
+        self.mode: Optional[str] = None
+        self.loaded_at: Optional[datetime] = None
+        self.load_ms: Optional[float] = None
+        self.last_event_at: Optional[datetime] = None
+        self.events_applied = 0
+
+    # lifecycle
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        product_stream.add_listener(self)
+
+    def stop(self) -> None:
+        product_stream.remove_listener(self)
+        self._started = False
+        self.ready = False
+
+    def load(self) -> int:
+        start = time.perf_counter()
+        cursor = mongo_service.db[self.collection_name].find(
+            NOT_DELETED, {f: 1 for f in PRODUCT_FIELDS}
+        )
+        # Index baru dibangun di luar lock lalu ditukar, reader tidak pernah melihat state setengah jadi
+        index = CatalogIndex(cursor)
+        with self._lock:
+            self._index = index
+        self.loaded_at = datetime.now()
+        self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.ready = True
+        logger.info(f"Catalog snapshot loaded {len(index.by_id)} products in {self.load_ms}ms")
+        return len(index.by_id)
+
+    # StreamListener, dipanggil dari thread watcher product_stream
+
+    def on_stream_open(self, resumed: bool) -> None:
+        # Stream sudah terbuka sebelum load, jadi perubahan selama load tidak terlewat
+        if not (resumed and self.ready):
+            self.load()
+        self.mode = "change_stream"
+
+    def on_change(self, change: dict) -> None:
+        self.apply_change(change)
+
+    def on_stream_error(self, error: Exception) -> None:
+        if self.mode != "polling":
+            logger.warning(f"Catalog change stream unavailable: {error}; polling every {settings.catalog_refresh_seconds}s")
+            self.mode = "polling"
+        due = self.loaded_at is None or (datetime.now() - self.loaded_at).total_seconds() >= settings.catalog_refresh_seconds
+        if due:
+            try:
+                self.load()
+            except Exception as load_error:
+                logger.error(f"Catalog snapshot load failed: {load_error}")
+
+    # incremental update
+
+    def apply_change(self, change: dict) -> None:
+        op = change.get("operationType")
+        with self._lock:
+            if op in ("insert", "update", "replace"):
+                doc = change.get("fullDocument")
+                if doc is not None:
+                    self._index.upsert(doc)
+            elif op == "delete":
+                product_id = self._index.by_oid.get((change.get("documentKey") or {}).get("_id"))
+                if product_id:
+                    self._index.remove(product_id)
+            elif op in ("drop", "rename", "invalidate"):
+                self.ready = False
+                return
+            else:
+                return
+        self.events_applied += 1
+        self.last_event_at = datetime.now()
+
+    def lookup_oid(self, oid) -> Optional[dict]:
+        # Untuk event hard delete tanpa pre-image: documentKey hanya berisi _id
+        with self._lock:
+            product_id = self._index.by_oid.get(oid)
+            row = self._index.by_id.get(product_id) if product_id else None
+            return {f: getattr(row, f) for f in ("product_id", "category", "status")} if row else None
+
+    def apply_local(self, product_id: str, changes: Optional[dict]) -> None:
+        # Write di proses ini langsung terlihat tanpa menunggu change stream (read-your-writes)
+        if not self.ready:
+            return
+        with self._lock:
+            if changes is None:
+                self._index.remove(product_id)
+            # Produk yang belum ada hanya disisipkan dari dokumen lengkap (create)
+            elif product_id in self._index.by_id or "created_at" in changes:
+                self._index.upsert({**_as_stored(changes), "product_id": product_id})
+
+    # reads
+
+    def get(self, product_id: str) -> Optional[dict]:
+        row = self._index.by_id.get(product_id)
+        return row.to_dict() if row is not None else None
+
+    def get_many(self, product_ids: List[str]) -> List[dict]:
+        by_id = self._index.by_id
+        return [by_id[i].to_dict() for i in product_ids if i in by_id]
+
+    def query(self, filters, offset: int, limit: int) -> Tuple[List[dict], int]:
+        """Padanan get_all_products: filter, sort (+product_id), lalu (data halaman, total)."""
+        sort = filters.sort or DEFAULT_SORT
+        descending = sort.startswith("-")
+        field = sort.lstrip("-")
+        ranges = _range_filters(filters)
+        with self._lock:
+            index = self._index
+            ordered = index.sorted[field]
+            facets = self._facet_sets(index, filters)
+            if not (ranges or filters.name or filters.low_stock_only):
+                if not facets:
+                    return self._page_all(index, ordered, descending, offset, limit)
+                candidates = facets[0].intersection(*facets[1:]) if len(facets) > 1 else facets[0]
+                total = len(candidates)
+                # Scan index terurut sampai halaman penuh, kecuali kandidat sedikit (lebih murah di-sort)
+                expected_scan = (offset + limit) * len(index.by_id) / max(total, 1)
+                if expected_scan < total * 4:
+                    return self._page_scan(index, ordered, candidates, descending, offset, limit), total
+                rows = [index.by_id[i] for i in candidates]
+            else:
+                rows = self._driver_rows(index, facets, ranges)
+                rows = _filter_rows(rows, filters, ranges)
+                total = len(rows)
+            rows.sort(key=lambda r: _sort_key(r, field), reverse=descending)
+            return [r.to_dict() for r in rows[offset:offset + limit]], total
+
+    @staticmethod
+    def _facet_sets(index: CatalogIndex, filters) -> List[Set[str]]:
+        sets = []
+        if filters.status:
+            sets.append(index.by_status.get(filters.status, set()))
+        if filters.category:
+            sets.append(index.by_category.get(filters.category, set()))
+        sets.sort(key=len)
+        return sets
+
+    @staticmethod
+    def _driver_rows(index: CatalogIndex, facets: List[Set[str]], ranges) -> Iterable[ProductRow]:
+        # Mulai dari sumber kandidat terkecil: set status/category atau potongan range dari index terurut
+        best: Optional[Iterable[str]] = facets[0] if facets else None
+        best_len = len(best) if best is not None else len(index.by_id)
+        for field, low, high in ranges:
+            keys = index.sorted[field].keys
+            lo = bisect.bisect_left(keys, (True, low)) if low is not None else bisect.bisect_left(keys, (True,))
+            hi = bisect.bisect_right(keys, (True, high, MAX_ID)) if high is not None else len(keys)
+            if hi - lo < best_len:
+                best, best_len = (k[2] for k in keys[lo:hi]), hi - lo
+        if best is None:
+            return index.by_id.values()
+        return [index.by_id[i] for i in best]
+
+    @staticmethod
+    def _page_all(index: CatalogIndex, ordered: SortedIndex, descending: bool, offset: int, limit: int):
+        keys = ordered.keys
+        total = len(keys)
+        if descending:
+            page = [keys[total - 1 - i] for i in range(offset, min(offset + limit, total))]
+        else:
+            page = keys[offset:offset + limit]
+        return [index.by_id[k[2]].to_dict() for k in page], total
+
+    @staticmethod
+    def _page_scan(index, ordered: SortedIndex, candidates: Set[str], descending: bool, offset: int, limit: int):
+        page_ids = []
+        if offset < len(candidates):
+            for product_id in ordered.product_ids(descending):
+                if product_id in candidates:
+                    if offset:
+                        offset -= 1
+                        continue
+                    page_ids.append(product_id)
+                    if len(page_ids) == limit:
+                        break
+        return [index.by_id[i].to_dict() for i in page_ids]
+
+    # reporting
+
+    def stats(self, include_memory: bool = True) -> dict:
+        with self._lock:
+            index = self._index
+            result = {
+                "enabled": settings.catalog_snapshot_enabled,
+                "ready": self.ready,
+                "mode": self.mode,
+                "products": len(index.by_id),
+                "statuses": len(index.by_status),
+                "categories": len(index.by_category),
+                "loaded_at": self.loaded_at,
+                "load_ms": self.load_ms,
+                "last_event_at": self.last_event_at,
+                "events_applied": self.events_applied,
+            }
+            if include_memory:
+                rows = list(index.by_id.values())
+                row_bytes = (
+                    sys.getsizeof(index.by_id)
+                    + sys.getsizeof(index.by_oid)
+                    + _sample_size(rows, _row_size)
+                )
+                facet_bytes = sum(
+                    sys.getsizeof(facet) + sum(sys.getsizeof(ids) for ids in facet.values())
+                    for facet in (index.by_status, index.by_category)
+                )
+                # Tuple key berbagi nilai dengan row; yang dihitung list + tuple-nya saja
+                sorted_bytes = sum(
+                    sys.getsizeof(s.keys) + len(s.keys) * sys.getsizeof((True, 0, ""))
+                    for s in index.sorted.values()
+                )
+                result["memory_bytes"] = {
+                    "rows": row_bytes,
+                    "facet_indexes": facet_bytes,
+                    "sorted_indexes": sorted_bytes,
+                    "total": row_bytes + facet_bytes + sorted_bytes,
+                }
+        return result
+
+
+catalog = CatalogSnapshot()
@@ -1,5 +1,10 @@
 from fastapi import HTTPException, status
-from typing import Optional
+from typing import List, Optional, Tuple
+from pathlib import Path
+
+# Filter dokumen yang belum di-soft-delete. $ne (bukan `False`) agar dokumen lama tanpa field
+# is_deleted (sebelum --migrate, atau ditulis instance versi lama saat rolling deploy) tetap terbaca
+NOT_DELETED = {"is_deleted": {"$ne": True}}
 
 def convert_object_id(data):
     # Do not surface Mongo's internal _id in API responses
@@ -14,4 +19,33 @@ def ensure_exists(doc: Optional[dict], entity: str):
 
 def _is_admin(u: dict) -> bool:
     roles = u.get("roles") or []
-    return "admin" in roles
\ No newline at end of file
+    return "admin" in roles
+
+def static_file_path(url: Optional[str], base_dir: Path) -> Optional[Path]:
+    # Path file /static/... hanya jika memang berada di dalam base_dir
+    prefix = f"/{base_dir.as_posix()}/"
+    if not url or not url.startswith(prefix):
+        return None
+    p = Path(url.lstrip("/")).resolve()
+    if base_dir.resolve() not in p.parents:
+        return None
+    return p
+
+def remove_static_file(url: Optional[str], base_dir: Path) -> None:
+    try:
+        p = static_file_path(url, base_dir)
+        if p is not None and p.is_file():
+            p.unlink(missing_ok=True)
+    except Exception:
+        pass
+
+def is_low_stock(doc: dict) -> bool:
+    low = doc.get("low_stock")
+    return low is not None and (doc.get("stock") or 0) <= low
+
+def order_by_ids(docs: List[dict], key: str, ids: List[str]) -> Tuple[List[dict], List[str]]:
+    # Urutkan hasil $in sesuai urutan request; id yang tidak ditemukan dikembalikan terpisah
+    by_id = {doc[key]: doc for doc in docs}
+    found = [by_id[i] for i in ids if i in by_id]
+    missing = [i for i in ids if i not in by_id]
+    return found, missing
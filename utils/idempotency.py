@@ -0,0 +1,76 @@
+import re
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from db import mongo_service
+from settings import settings
+
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+def record_key(idempotency_key: str, method: str, path: str, subject: Optional[str]) -> str:
+    # Key di-scope per user + endpoint agar tidak bisa me-replay response milik user lain
+    raw = f"{subject or '-'}|{method}|{path}|{idempotency_key}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def fingerprint(body: bytes, content_type: Optional[str] = None) -> str:
+    # Boundary multipart dibuat acak per request oleh client, jadi diganti konstanta
+    # agar retry dengan form/file yang sama menghasilkan fingerprint yang sama
+    match = re.search(r"boundary=\"?([^\";]+)", content_type or "")
+    if match and (content_type or "").lower().startswith("multipart/"):
+        body = body.replace(b"--" + match.group(1).encode("latin-1"), b"--boundary")
+    return hashlib.sha256(body).hexdigest()
+
+
+def reserve(key: str, body_fingerprint: str) -> Optional[dict]:
+    """
+    Tandai key sebagai in_progress. Kembalikan None jika berhasil direservasi
+    (request harus dijalankan), atau record yang sudah ada.
+
+    Reservasi punya lease `locked_until`: jika proses mati sebelum complete/release,
+    retry dengan body yang sama boleh mengambil alih key setelah lease habis.
+    """
+    # UTC-aware: TTL membaca datetime naive sebagai UTC, bukan waktu lokal
+    now = datetime.now(timezone.utc)
+    lease = {
+        "state": IN_PROGRESS,
+        "fingerprint": body_fingerprint,
+        "locked_until": now + timedelta(seconds=settings.idempotency_lock_seconds),
+        "expires_at": now + timedelta(hours=settings.idempotency_ttl_hours),
+    }
+    try:
+        mongo_service.insert_one(IDEMPOTENCY_COLLECTION, {"_id": key, **lease})
+        return None
+    except DuplicateKeyError:
+        pass
+    taken = mongo_service.db[IDEMPOTENCY_COLLECTION].find_one_and_update(
+        {
+            "_id": key,
+            "state": IN_PROGRESS,
+            "fingerprint": body_fingerprint,
+            "locked_until": {"$lt": now},
+        },
+        {"$set": lease},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if taken is not None:
+        return None
+    return mongo_service.find_one(IDEMPOTENCY_COLLECTION, {"_id": key}) or {}
+
+
+def complete(key: str, status_code: int, headers: dict, body: bytes) -> None:
+    mongo_service.update_one(
+        IDEMPOTENCY_COLLECTION,
+        {"_id": key},
+        {"state": COMPLETED, "status_code": status_code, "headers": headers, "body": body, "locked_until": None},
+    )
+
+
+def release(key: str) -> None:
+    # Response gagal (5xx/exception): hapus agar retry bisa menjalankan ulang request
+    mongo_service.delete_one(IDEMPOTENCY_COLLECTION, {"_id": key})
@@ -0,0 +1,141 @@
+import logging
+from typing import Dict, Iterable
+from pymongo.errors import PyMongoError
+from db import mongo_service
+from utils.helper import is_low_stock, NOT_DELETED
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLLECTION = "inventory_summary"
+FACETS = ("category", "status")
+METRICS = ("count", "total_stock", "stock_value", "low_stock_count")
+
+
+def _contribution(doc: dict) -> dict:
+    stock = doc.get("stock") or 0
+    return {
+        "count": 1,
+        "total_stock": stock,
+        "stock_value": stock * (doc.get("unit_price") or 0),
+        "low_stock_count": 1 if is_low_stock(doc) else 0,
+    }
+
+
+def _summary_keys(doc: dict) -> list[str]:
+    # _id dokumen summary: "total", "category:<nama>", "status:<nama>"
+    return ["total"] + [f"{facet}:{doc.get(facet)}" for facet in FACETS]
+
+
+def _accumulate(incs: Dict[str, dict], doc: dict, sign: int) -> None:
+    contrib = _contribution(doc)
+    for key in _summary_keys(doc):
+        bucket = incs.setdefault(key, dict.fromkeys(METRICS, 0))
+        for metric, value in contrib.items():
+            bucket[metric] += sign * value
+
+
+def _apply(incs: Dict[str, dict]) -> None:
+    try:
+        mongo_service.inc_many(SUMMARY_COLLECTION, incs)
+    except PyMongoError as e:
+        # Produk sudah tersimpan; summary bisa diperbaiki lewat rebuild_summary()
+        logger.error(f"Failed to update inventory summary: {e}")
+
+
+def record_created(docs: Iterable[dict]) -> None:
+    incs: Dict[str, dict] = {}
+    for doc in docs:
+        _accumulate(incs, doc, 1)
+    _apply(incs)
+
+
+def record_updated(before: dict, after: dict) -> None:
+    incs: Dict[str, dict] = {}
+    _accumulate(incs, before, -1)
+    _accumulate(incs, after, 1)
+    _apply(incs)
+
+
+def record_deleted(doc: dict) -> None:
+    record_removed([doc])
+
+
+def record_removed(docs: Iterable[dict]) -> None:
+    incs: Dict[str, dict] = {}
+    for doc in docs:
+        _accumulate(incs, doc, -1)
+    _apply(incs)
+
+
+def _metrics_group(group_id) -> dict:
+    return {
+        "$group": {
+            "_id": group_id,
+            "count": {"$sum": 1},
+            "total_stock": {"$sum": {"$ifNull": ["$stock", 0]}},
+            "stock_value": {
+                "$sum": {"$multiply": [{"$ifNull": ["$stock", 0]}, {"$ifNull": ["$unit_price", 0]}]}
+            },
+            "low_stock_count": {
+                "$sum": {"$cond": [{"$lte": ["$stock", "$low_stock"]}, 1, 0]}
+            },
+        }
+    }
+
+
+def _live_docs() -> list[dict]:
+    """Hitung summary langsung dari `inventory` dengan satu aggregation $facet."""
+    pipeline = [
+        {"$match": NOT_DELETED},
+        {
+            "$facet": {
+                "total": [_metrics_group(None)],
+                **{facet: [_metrics_group(f"${facet}")] for facet in FACETS},
+            }
+        }
+    ]
+    result = mongo_service.aggregate("inventory", pipeline)[0]
+    docs = []
+    for facet, rows in result.items():
+        for row in rows:
+            key = "total" if facet == "total" else f"{facet}:{row['_id']}"
+            docs.append({**row, "_id": key})
+    return docs
+
+
+def rebuild_summary() -> dict:
+    """Hitung ulang summary dari `inventory` lalu simpan."""
+    docs = _live_docs()
+    # Replace per bucket lalu hapus bucket yang sudah tidak ada: pembaca tidak pernah
+    # melihat collection kosong/setengah jadi, dan rebuild paralel tidak bentrok DuplicateKey
+    mongo_service.replace_many(SUMMARY_COLLECTION, docs)
+    mongo_service.db[SUMMARY_COLLECTION].delete_many({"_id": {"$nin": [doc["_id"] for doc in docs]}})
+    return _to_response(docs)
+
+
+def _to_response(docs: list[dict]) -> dict:
+    result: dict = {"total": dict.fromkeys(METRICS, 0), **{facet: [] for facet in FACETS}}
+    for doc in docs:
+        metrics = {m: doc.get(m, 0) for m in METRICS}
+        if doc["_id"] == "total":
+            result["total"] = metrics
+            continue
+        facet, _, value = doc["_id"].partition(":")
+        # Bucket yang sudah kosong (semua produk pindah/terhapus) tidak ditampilkan
+        if facet in FACETS and metrics["count"] > 0:
+            result[facet].append({"value": value, **metrics})
+    for facet in FACETS:
+        result[facet].sort(key=lambda b: b["count"], reverse=True)
+    return result
+
+
+def get_summary(rebuild_if_empty: bool = True) -> dict:
+    try:
+        docs = list(mongo_service.db[SUMMARY_COLLECTION].find({}))
+        if not docs and rebuild_if_empty:
+            return rebuild_summary()
+    except PyMongoError as e:
+        # Collection summary tidak terbaca/tertulis: hitung langsung dari `inventory` tanpa menyimpan
+        logger.error(f"Failed to read inventory summary, using live aggregation: {e}")
+        return _to_response(_live_docs())
+    return _to_response(docs)
@@ -0,0 +1,253 @@
+import os
+import uuid
+import random
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import PyMongoError
+from starlette.concurrency import run_in_threadpool
+from db import mongo_service
+from settings import settings
+from utils.helper import static_file_path
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "jobs"
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+JOB_STATUSES = (QUEUED, RUNNING, SUCCEEDED, FAILED)
+
+# type job -> handler(payload). Handler sync dijalankan di threadpool, async di event loop
+JOB_HANDLERS: Dict[str, Callable[[dict], object]] = {}
+
+
+def job_handler(job_type: str):
+    def decorator(fn):
+        JOB_HANDLERS[job_type] = fn
+        return fn
+
+    return decorator
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _node_id() -> str:
+    return socket.gethostname()
+
+
+def enqueue(
+    job_type: str,
+    payload: dict,
+    max_attempts: Optional[int] = None,
+    delay_seconds: float = 0,
+    node: Optional[str] = None,
+) -> str:
+    """`node`: hanya worker di host itu yang boleh mengambil job (mis. file di disk lokal); None = siapa saja."""
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+    job_id = str(uuid.uuid4())
+    # Timestamp UTC-aware: TTL (expires_at) membaca nilai naive sebagai UTC
+    now = datetime.now(timezone.utc)
+    mongo_service.db[JOBS_COLLECTION].insert_one(
+        {
+            "job_id": job_id,
+            "type": job_type,
+            "payload": payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts or settings.job_max_attempts,
+            "run_at": now + timedelta(seconds=delay_seconds),
+            "node": node,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+    )
+    job_queue.wake()
+    return job_id
+
+
+def claim_next() -> Optional[dict]:
+    """Ambil satu job yang jatuh tempo (atau yang lease-nya habis karena worker mati) secara atomik."""
+    now = datetime.now(timezone.utc)
+    claimed = {
+        "status": RUNNING,
+        "worker": _worker_id(),
+        "started_at": now,
+        "locked_until": now + timedelta(seconds=settings.job_lease_seconds),
+        "updated_at": now,
+    }
+    # BEFORE + merge lokal: filter status tidak lagi cocok setelah update
+    job = mongo_service.db[JOBS_COLLECTION].find_one_and_update(
+        {
+            "$or": [
+                {"status": QUEUED, "run_at": {"$lte": now}},
+                {"status": RUNNING, "locked_until": {"$lt": now}},
+            ],
+            # Job tanpa node (atau dari sebelum field ini ada) bisa diambil semua node
+            "node": {"$in": [None, _node_id()]},
+        },
+        {"$set": claimed, "$inc": {"attempts": 1}},
+        sort=[("run_at", ASCENDING)],
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if job is None:
+        return None
+    return {**job, **claimed, "attempts": job["attempts"] + 1}
+
+
+def backoff_seconds(attempts: int) -> float:
+    # Exponential backoff dengan jitter agar retry dari banyak job tidak serentak
+    delay = min(settings.job_backoff_max_seconds, settings.job_backoff_seconds * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _finish(job: dict, data: dict) -> None:
+    now = datetime.now(timezone.utc)
+    # Guard worker: jangan timpa status jika lease sudah diambil alih worker lain
+    mongo_service.db[JOBS_COLLECTION].update_one(
+        {"job_id": job["job_id"], "status": RUNNING, "worker": job["worker"]},
+        {"$set": {**data, "updated_at": now}, "$unset": {"locked_until": ""}},
+    )
+
+
+def mark_succeeded(job: dict) -> None:
+    now = datetime.now(timezone.utc)
+    _finish(
+        job,
+        {
+            "status": SUCCEEDED,
+            "finished_at": now,
+            "expires_at": now + timedelta(days=settings.job_retention_days),
+        },
+    )
+
+
+def mark_failed(job: dict, error: str) -> None:
+    now = datetime.now(timezone.utc)
+    if job["attempts"] >= job["max_attempts"]:
+        logger.error(f"Job {job['job_id']} ({job['type']}) failed after {job['attempts']} attempts: {error}")
+        _finish(
+            job,
+            {
+                "status": FAILED,
+                "last_error": error,
+                "finished_at": now,
+                "expires_at": now + timedelta(days=settings.job_retention_days),
+            },
+        )
+        return
+    delay = backoff_seconds(job["attempts"])
+    logger.warning(f"Job {job['job_id']} ({job['type']}) attempt {job['attempts']} failed, retrying in {delay:.1f}s: {error}")
+    _finish(job, {"status": QUEUED, "last_error": error, "run_at": now + timedelta(seconds=delay)})
+
+
+def retry(job_id: str) -> Optional[dict]:
+    # Jalankan ulang job yang sudah FAILED dengan jatah attempt baru
+    now = datetime.now(timezone.utc)
+    requeued = {"status": QUEUED, "attempts": 0, "run_at": now, "updated_at": now}
+    job = mongo_service.db[JOBS_COLLECTION].find_one_and_update(
+        {"job_id": job_id, "status": FAILED},
+        {"$set": requeued, "$unset": {"finished_at": "", "expires_at": ""}},
+        projection={"_id": 0, "finished_at": 0, "expires_at": 0},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if job is None:
+        return None
+    job_queue.wake()
+    return {**job, **requeued}
+
+
+class JobQueue:
+    """Worker pool in-process; job disimpan di collection `jobs` sehingga bertahan saat restart."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self, concurrency: int) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(concurrency)]
+
+    async def stop(self) -> None:
+        # Job yang sedang jalan di threadpool tidak bisa dibatalkan; lease-nya habis lalu diambil ulang
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def wake(self) -> None:
+        # Dipanggil dari handler sync (thread lain), jadi lewat call_soon_threadsafe
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._event.set)
+
+    async def _worker(self) -> None:
+        while True:
+            self._event.clear()
+            try:
+                job = await run_in_threadpool(claim_next)
+            except PyMongoError as e:
+                logger.error(f"Failed to claim job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._event.wait(), timeout=settings.job_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.run(job)
+
+    async def run(self, job: dict) -> None:
+        handler = JOB_HANDLERS.get(job["type"])
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job type '{job['type']}'")
+            if asyncio.iscoroutinefunction(handler):
+                await handler(job["payload"])
+            else:
+                await run_in_threadpool(handler, job["payload"])
+        except Exception as e:
+            logger.debug(f"Job {job['job_id']} raised", exc_info=True)
+            await run_in_threadpool(mark_failed, job, f"{type(e).__name__}: {e}")
+            return
+        await run_in_threadpool(mark_succeeded, job)
+
+
+job_queue = JobQueue()
+
+
+@job_handler("delete_static_file")
+def delete_static_file(payload: dict) -> None:
+    # OSError dibiarkan naik supaya job di-retry
+    p = static_file_path(payload.get("url"), Path(payload["base_dir"]))
+    if p is not None:
+        p.unlink(missing_ok=True)
+
+
+def enqueue_file_cleanup(url: Optional[str], base_dir: Path) -> None:
+    if not url:
+        return
+    # File ada di static/ node ini; node lain tidak bisa menghapusnya kecuali storage-nya bersama
+    node = None if settings.static_shared_storage else _node_id()
+    try:
+        enqueue("delete_static_file", {"url": url, "base_dir": base_dir.as_posix()}, node=node)
+    except PyMongoError as e:
+        # Data sudah tersimpan; file lama paling buruk tertinggal di disk
+        logger.error(f"Failed to enqueue cleanup of {url}: {e}")
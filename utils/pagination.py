@@ -13,23 +13,19 @@ class Pagination:
         result["offset"] = offset
         return result
 
-    def get_pagination_info(self, total_data: str, data: List[dict], limit: str, page: str) -> Dict[str, str]:
-        result = {}
-
-        limit_double = float(limit)
-        total_data_int = int(total_data)
-
-        total_pages = int(-(-total_data_int // limit_double))
-
-        result["size"] = limit
-        result["totalElements"] = str(total_data_int)
-        result["totalPages"] = str(total_pages)
-        result["currentPage"] = page
-
-        return result
+    def get_pagination_info(self, total_data: int, data: List[dict], limit: int, page: int) -> Dict[str, int]:
+        # Integer murni: tanpa konversi str -> float -> str di setiap request
+        total_data = int(total_data)
+        limit = int(limit)
+        return {
+            "size": limit,
+            "totalElements": total_data,
+            "totalPages": -(-total_data // limit),
+            "currentPage": int(page),
+        }
 
 class PaginationInfo(BaseModel):
-    size: str
-    totalElements: str
-    totalPages: str
-    currentPage: str
\ No newline at end of file
+    size: int
+    totalElements: int
+    totalPages: int
+    currentPage: int
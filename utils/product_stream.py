@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Protocol, Set
+from fastapi.encoders import jsonable_encoder
+from pymongo.errors import OperationFailure
+from db import mongo_service
+
+logger = logging.getLogger(__name__)
+
+QUEUE_MAX = 256  # event per subscriber sebelum dianggap lambat
+WATCH_RETRY_SECONDS = 1
+WATCH_RETRY_MAX_SECONDS = 60
+# Server < 6.0 menolak option fullDocumentBeforeChange sebagai field tak dikenal
+UNKNOWN_FIELD = 40415
+# Resume token tidak bisa dipakai lagi (oplog sudah lewat): buka stream baru
+CHANGE_STREAM_FATAL = (280, 286)
+RESYNC_EVENT = {"type": "resync", "product_id": None, "data": None}
+# Field yang bisa difilter subscriber; perubahan di sini bisa memindahkan produk keluar filter
+FILTER_FIELDS = ("category", "status")
+# Archiver memindahkan dokumen (dengan _id yang sama) ke sini sebelum hard delete
+INVENTORY_ARCHIVE = "inventory_archive"
+
+
+@dataclass(eq=False)
+class Subscriber:
+    category: Optional[str] = None
+    status: Optional[str] = None
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=QUEUE_MAX))
+
+    def matches(self, doc: Optional[dict]) -> bool:
+        # Tanpa field (delete tanpa pre-image maupun arsip) tidak bisa difilter, kirim ke semua
+        if not doc:
+            return True
+        if self.category and doc.get("category") != self.category:
+            return False
+        if self.status and doc.get("status") != self.status:
+            return False
+        return True
+
+    def route(self, event: dict, before: Optional[dict]) -> Optional[dict]:
+        """
+        Event untuk subscriber ini, atau None. `before` berisi FILTER_FIELDS sebelum change
+        (None jika tidak diketahui). Produk yang keluar dari filter dikirim sebagai delete.
+        """
+        if event["type"] == "delete":
+            return event if self.matches(event["data"] or before) else None
+        if self.matches(event["data"]):
+            return event
+        if event["type"] != "insert" and self.matches(before):
+            return {"type": "delete", "product_id": event["product_id"], "data": None}
+        return None
+
+
+class StreamListener(Protocol):
+    """Konsumen change stream di thread watcher (tanpa event loop), mis. catalog snapshot."""
+
+    def on_stream_open(self, resumed: bool) -> None: ...
+
+    def on_change(self, change: dict) -> None: ...
+
+    def on_stream_error(self, error: Exception) -> None: ...
+
+
+class ProductStream:
+    """
+    Satu change-stream watcher per proses untuk collection `inventory`,
+    di-fan-out ke semua subscriber WebSocket/SSE.
+    Subscriber yang lambat tidak memblok yang lain: jika queue penuh,
+    isinya dibuang dan diganti satu event `resync` agar client refetch.
+
+    Listener (StreamListener) menerima change mentah di thread watcher dan ikut
+    menjaga watcher tetap hidup, sehingga proses cukup membuka satu cursor.
+
+    Pre-image untuk event delete (`full_document_before_change`) butuh MongoDB 6.0+;
+    di server lama watcher otomatis jalan tanpa pre-image.
+    """
+
+    def __init__(self, collection_name: str = "inventory"):
+        self.collection_name = collection_name
+        self._subscribers: Set[Subscriber] = set()
+        self._listeners: Set[StreamListener] = set()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pre_images = True
+
+    def subscribe(self, category: Optional[str] = None, status: Optional[str] = None) -> Subscriber:
+        sub = Subscriber(category=category, status=status)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.add(sub)
+            if self._thread is None:
+                self._start()
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def add_listener(self, listener: StreamListener) -> None:
+        with self._lock:
+            self._listeners.add(listener)
+            if self._thread is None:
+                self._start()
+
+    def remove_listener(self, listener: StreamListener) -> None:
+        with self._lock:
+            self._listeners.discard(listener)
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._watch, name="product-stream", daemon=True)
+        self._thread.start()
+
+    def _active(self) -> bool:
+        return bool(self._subscribers or self._listeners)
+
+    def _idle(self) -> bool:
+        # Watcher berhenti sendiri saat subscriber/listener terakhir pergi
+        with self._lock:
+            if self._active():
+                return False
+            self._thread = None
+            return True
+
+    def _notify(self, method: str, *args) -> None:
+        for listener in list(self._listeners):
+            try:
+                getattr(listener, method)(*args)
+            except Exception as e:
+                logger.error(f"Product stream listener {method} failed: {type(e).__name__}: {e}")
+
+    def _broadcast(self, event: dict, before: Optional[dict] = None) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed() and self._subscribers:
+            loop.call_soon_threadsafe(self._publish, event, before)
+
+    def _watch(self) -> None:
+        try:
+            self._watch_loop()
+        finally:
+            # Apa pun penyebab thread berhenti, subscribe berikutnya harus bisa start ulang
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+        logger.info("Product change stream stopped")
+
+    def _open(self, resume_token):
+        collection = mongo_service.db[self.collection_name]
+        options = {"full_document": "updateLookup", "resume_after": resume_token, "max_await_time_ms": 1000}
+        if self._pre_images:
+            options["full_document_before_change"] = "whenAvailable"
+        return collection.watch(**options)
+
+    def _watch_loop(self) -> None:
+        resume_token = None
+        delay = WATCH_RETRY_SECONDS
+        while not self._idle():
+            try:
+                with self._open(resume_token) as stream:
+                    delay = WATCH_RETRY_SECONDS
+                    # Listener yang baru load dari awal di sini; change selama load tertahan di cursor
+                    self._notify("on_stream_open", resume_token is not None)
+                    while self._active() and stream.alive:
+                        change = stream.try_next()
+                        if change is None:
+                            continue
+                        resume_token = stream.resume_token
+                        # Event dibuat sebelum listener: catalog membuang mapping _id saat delete
+                        routed = self._to_event(change) if self._subscribers else None
+                        self._notify("on_change", change)
+                        if routed:
+                            self._broadcast(*routed)
+            except OperationFailure as e:
+                if self._pre_images and (e.code == UNKNOWN_FIELD or "fullDocumentBeforeChange" in str(e)):
+                    logger.warning("Change stream pre-images need MongoDB 6.0+; delete events will carry no data")
+                    self._pre_images = False
+                    continue
+                if e.code in CHANGE_STREAM_FATAL and resume_token is not None:
+                    # Event di antaranya hilang; client diminta refetch
+                    resume_token = None
+                    self._broadcast(dict(RESYNC_EVENT))
+                self._notify("on_stream_error", e)
+                delay = self._backoff(e, delay)
+            except Exception as e:
+                # Change stream butuh replica set; error apa pun di-retry agar watcher tidak mati
+                self._notify("on_stream_error", e)
+                delay = self._backoff(e, delay)
+
+    @staticmethod
+    def _backoff(error: Exception, delay: float) -> float:
+        logger.warning(f"Product change stream error: {type(error).__name__}: {error}; retrying in {delay}s")
+        time.sleep(delay)
+        return min(delay * 2, WATCH_RETRY_MAX_SECONDS)
+
+    def _to_event(self, change: dict) -> Optional[tuple[dict, Optional[dict]]]:
+        """Ubah change mentah menjadi (event untuk client, FILTER_FIELDS sebelum change)."""
+        op = change.get("operationType")
+        if op not in ("insert", "update", "replace", "delete"):
+            return None
+        after = change.get("fullDocument")
+        before = change.get("fullDocumentBeforeChange")
+        if before is None:
+            before = self._previous(change, after)
+        doc = dict(after or change.get("fullDocumentBeforeChange") or {})
+        doc.pop("_id", None)
+        if doc.get("is_deleted"):
+            # Soft delete tampil ke client sebagai delete biasa
+            op = "delete"
+        event = {
+            "type": op,
+            "product_id": doc.get("product_id") or (before or {}).get("product_id"),
+            "data": jsonable_encoder(doc) if doc else None,
+        }
+        return event, {f: before.get(f) for f in FILTER_FIELDS} if before else None
+
+    def _previous(self, change: dict, after: Optional[dict]) -> Optional[dict]:
+        # Tanpa pre-image: field filter lama masih bisa diketahui dari sumber lain
+        op = change["operationType"]
+        if op == "delete":
+            # Hard delete dari archiver: dokumennya sudah ada di arsip dengan _id yang sama
+            key = (change.get("documentKey") or {}).get("_id")
+            if key is None:
+                return None
+            try:
+                archived = mongo_service.db[INVENTORY_ARCHIVE].find_one(
+                    {"_id": key}, {"product_id": 1, **{f: 1 for f in FILTER_FIELDS}}
+                )
+            except Exception as e:
+                logger.warning(f"Archive lookup for deleted product failed: {type(e).__name__}: {e}")
+                archived = None
+            if archived is not None:
+                return archived
+            # Hard delete lain: produk aktif masih dikenal catalog snapshot (jika berjalan)
+            from utils.catalog import catalog
+
+            return catalog.lookup_oid(key)
+        if op == "update" and after is not None:
+            description = change.get("updateDescription") or {}
+            touched = set(description.get("updatedFields") or {}) | set(description.get("removedFields") or [])
+            if not touched & set(FILTER_FIELDS):
+                # Field filter tidak berubah, jadi nilai lama sama dengan post-image
+                return after
+        return None
+
+    def _publish(self, event: dict, before: Optional[dict] = None) -> None:
+        for sub in list(self._subscribers):
+            routed = sub.route(event, before)
+            if routed is None:
+                continue
+            try:
+                sub.queue.put_nowait(routed)
+            except asyncio.QueueFull:
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.queue.put_nowait(dict(RESYNC_EVENT))
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+product_stream = ProductStream()
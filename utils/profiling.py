@@ -0,0 +1,161 @@
+import time
+import random
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+from settings import settings
+from utils.logging_config import request_id_ctx
+
+# Profile request aktif; None berarti request ini tidak diprofile (overhead ~0)
+profile_ctx: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+
+class RequestProfile:
+    """
+    Profiler ringan per request: waktu dikelompokkan per kategori (mongo, bcrypt,
+    validation, serialization, handler) sebagai self-time, jadi span bersarang
+    tidak terhitung dua kali. Sisa waktu masuk ke kategori `other`.
+    """
+
+    def __init__(self, method: str, path: str, forced: bool = False):
+        self.request_id = request_id_ctx.get()
+        self.method = method
+        self.path = path
+        self.forced = forced
+        self.started_at = datetime.now()
+        self.categories: Dict[str, Dict[str, float]] = {}
+        self.mongo_commands: List[dict] = []
+        self.duration_ms = 0.0
+        self.status_code = 0
+        self._stack: List[list] = []
+        self._lock = threading.Lock()
+
+    def _record(self, category: str, self_ms: float) -> None:
+        bucket = self.categories.setdefault(category, {"count": 0, "ms": 0.0})
+        bucket["count"] += 1
+        bucket["ms"] += self_ms
+
+    def push(self) -> list:
+        frame = [0.0]  # total durasi child span
+        with self._lock:
+            self._stack.append(frame)
+        return frame
+
+    def pop(self, frame: list, category: str, duration_ms: float) -> None:
+        with self._lock:
+            for i, f in enumerate(self._stack):
+                if f is frame:
+                    del self._stack[i]
+                    break
+            if self._stack:
+                self._stack[-1][0] += duration_ms
+            self._record(category, duration_ms - frame[0])
+
+    def add_leaf(self, category: str, duration_ms: float, detail: Optional[dict] = None) -> None:
+        with self._lock:
+            if self._stack:
+                self._stack[-1][0] += duration_ms
+            self._record(category, duration_ms)
+            if detail is not None:
+                self.mongo_commands.append(detail)
+
+    def finish(self, status_code: int, duration_ms: float) -> None:
+        self.status_code = status_code
+        self.duration_ms = duration_ms
+        accounted = sum(b["ms"] for b in self.categories.values())
+        self.categories["other"] = {"count": 1, "ms": max(duration_ms - accounted, 0.0)}
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={b['ms']:.1f}" for name, b in self.categories.items())
+
+    def to_dict(self) -> dict:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "forced": self.forced,
+            "categories": {
+                name: {"count": b["count"], "ms": round(b["ms"], 2)}
+                for name, b in sorted(self.categories.items(), key=lambda kv: -kv[1]["ms"])
+            },
+            "mongo_commands": self.mongo_commands,
+        }
+
+
+@contextmanager
+def span(category: str):
+    profile = profile_ctx.get()
+    if profile is None:
+        yield
+        return
+    frame = profile.push()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.pop(frame, category, (time.perf_counter() - start) * 1000)
+
+
+class SlowRequestBuffer:
+    def __init__(self, size: int):
+        self._items: Deque[dict] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._items.append(profile.to_dict())
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            return list(reversed(self._items))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+slow_requests = SlowRequestBuffer(settings.profiling_ring_size)
+
+
+def should_profile(header_value: Optional[str]) -> tuple[bool, bool]:
+    """Kembalikan (profile?, forced?) berdasarkan header X-Profile dan sampling rate."""
+    if header_value and settings.profiling_header_enabled and header_value.lower() in ("1", "true", "yes"):
+        return True, True
+    rate = settings.profiling_sample_rate
+    return rate > 0 and random.random() < rate, False
+
+
+def profiling_enabled() -> bool:
+    # Tanpa sampling maupun header, tidak ada request yang bisa diprofile
+    return settings.profiling_sample_rate > 0 or settings.profiling_header_enabled
+
+
+def instrument_fastapi() -> None:
+    """
+    Bungkus tahap validasi request dan serialisasi response FastAPI dengan span.
+    Hanya dipasang jika profiling aktif, agar fungsi internal FastAPI tidak diganti tanpa perlu.
+    """
+    import fastapi.routing as routing
+
+    if not profiling_enabled() or getattr(routing, "_profiling_instrumented", False):
+        return
+
+    def wrap(func, category):
+        async def wrapped(*args, **kwargs):
+            with span(category):
+                return await func(*args, **kwargs)
+
+        return wrapped
+
+    routing.solve_dependencies = wrap(routing.solve_dependencies, "validation")
+    routing.run_endpoint_function = wrap(routing.run_endpoint_function, "handler")
+    routing.serialize_response = wrap(routing.serialize_response, "serialization")
+    routing._profiling_instrumented = True
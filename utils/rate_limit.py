@@ -0,0 +1,129 @@
+import time
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, FrozenSet, Optional, Tuple
+from settings import settings
+
+RATE_LIMIT_COLLECTION = "rate_limits"
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    name: str
+    path: str
+    scope: str  # "ip" atau "user" (jatuh ke ip jika tidak ada token)
+    rate: float  # token per detik
+    burst: int
+    methods: Optional[FrozenSet[str]] = None
+    exact: bool = False
+    exclude: FrozenSet[str] = frozenset()
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.methods and method not in self.methods:
+            return False
+        if path in self.exclude:
+            return False
+        return path == self.path if self.exact else path.startswith(self.path)
+
+
+WRITE_METHODS = frozenset({"POST", "PUT", "DELETE"})
+# POST yang hanya membaca (batch lookup), tidak dihitung sebagai write
+PRODUCT_READ_POSTS = frozenset({"/product/controller/api/v1/products/batch"})
+USER_READ_POSTS = frozenset({"/user/controller/api/v1/users/batch"})
+
+RATE_LIMIT_POLICIES = [
+    # Login: bcrypt mahal, batasi per IP (per akun + IP dibatasi di handler login)
+    RateLimitPolicy("login-ip", "/auth/controller/api/v1/login", "ip", rate=10 / 60, burst=10, exact=True),
+    RateLimitPolicy("register-ip", "/auth/controller/api/v1/register", "ip", rate=5 / 60, burst=5, exact=True),
+    RateLimitPolicy("product-write", "/product/controller", "user", rate=5, burst=20, methods=WRITE_METHODS,
+                    exclude=PRODUCT_READ_POSTS),
+    RateLimitPolicy("user-write", "/user/controller", "user", rate=5, burst=20, methods=WRITE_METHODS,
+                    exclude=USER_READ_POSTS),
+    RateLimitPolicy("global-ip", "/", "ip", rate=50, burst=100),
+]
+# Per akun (email saja, lintas IP): menahan credential stuffing terdistribusi yang lolos dari
+# login-ip. Lebih longgar dari login-ip agar pemilik akun jarang ikut terkunci: 30 per 15 menit.
+LOGIN_ACCOUNT_RATE = 30 / 900
+LOGIN_ACCOUNT_BURST = 30
+
+
+class MemoryRateLimitBackend:
+    """Token bucket per proses. Dipakai default dan sebagai stand-in lokal untuk backend shared."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def hit(self, key: str, rate: float, burst: int, cost: float = 1) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - ts) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            if len(self._buckets) >= self._max_keys and key not in self._buckets:
+                # Jaga memori: buang bucket tertua (insertion order)
+                self._buckets.pop(next(iter(self._buckets)))
+            self._buckets[key] = (tokens, now)
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return allowed, retry_after
+
+
+class MongoRateLimitBackend:
+    """
+    Token bucket shared antar worker/node di collection `rate_limits`.
+    Refill dan pengurangan token dihitung atomik di server dengan satu pipeline update.
+    """
+
+    blocking = True
+
+    def __init__(self, collection_name: str = RATE_LIMIT_COLLECTION):
+        self.collection_name = collection_name
+
+    def hit(self, key: str, rate: float, burst: int, cost: float = 1) -> Tuple[bool, float]:
+        from pymongo import ReturnDocument
+        from db import mongo_service
+
+        now = time.time()
+        refilled = {
+            "$min": [
+                burst,
+                {
+                    "$add": [
+                        {"$ifNull": ["$tokens", burst]},
+                        {"$multiply": [{"$subtract": [now, {"$ifNull": ["$ts", now]}]}, rate]},
+                    ]
+                },
+            ]
+        }
+        pipeline = [
+            {"$set": {"tokens": refilled, "ts": now}},
+            {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+            {
+                "$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                    # TTL: bucket yang penuh kembali tidak perlu disimpan
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=burst / rate + 60),
+                }
+            },
+        ]
+        doc = mongo_service.db[self.collection_name].find_one_and_update(
+            {"_id": key}, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (cost - doc["tokens"]) / rate
+
+
+def _build_backend():
+    if settings.rate_limit_backend == "mongo":
+        return MongoRateLimitBackend()
+    return MemoryRateLimitBackend()
+
+
+rate_limiter = _build_backend()
@@ -0,0 +1,139 @@
+import time
+import signal
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+WARMUP_RETRY_SECONDS = 2
+SHUTDOWN_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+def _ping_mongo() -> None:
+    from db import mongo_service
+
+    mongo_service.ping()
+
+
+def _ensure_indexes() -> None:
+    from db.indexes import ensure_indexes
+
+    ensure_indexes()
+
+
+def _load_bcrypt() -> None:
+    # Backend bcrypt passlib di-load saat hash pertama; jangan biarkan login pertama yang membayar
+    from utils.auth import get_password_hash
+
+    get_password_hash("warm-up")
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("mongo", _ping_mongo),
+    ("indexes", _ensure_indexes),
+    ("bcrypt", _load_bcrypt),
+]
+
+
+class Readiness:
+    """Status warm-up proses, dilaporkan oleh endpoint /ready."""
+
+    def __init__(self):
+        self.ready = False
+        self.shutting_down = False
+        self.started_at: Optional[datetime] = None
+        self.checks: Dict[str, dict] = {}
+
+    async def warm_up(self, steps: List[Tuple[str, Callable[[], None]]] = WARMUP_STEPS) -> None:
+        self.started_at = datetime.now()
+        for name, step in steps:
+            attempts = 0
+            while True:
+                attempts += 1
+                start = time.perf_counter()
+                try:
+                    await run_in_threadpool(step)
+                except Exception as e:
+                    self.checks[name] = {"ok": False, "attempts": attempts, "error": str(e)}
+                    logger.warning(f"Warm-up step '{name}' failed: {e}; retrying in {WARMUP_RETRY_SECONDS}s")
+                    await asyncio.sleep(WARMUP_RETRY_SECONDS)
+                    continue
+                self.checks[name] = {
+                    "ok": True,
+                    "attempts": attempts,
+                    "ms": round((time.perf_counter() - start) * 1000, 1),
+                }
+                break
+        # Warm-up yang selesai saat shutdown sudah dimulai tidak boleh membuat /ready hijau lagi
+        self.ready = not self.shutting_down
+        logger.info(f"Warm-up finished: {self.checks}")
+
+    def mark_shutting_down(self) -> None:
+        self.shutting_down = True
+        self.ready = False
+
+    @contextmanager
+    def shutdown_signals(self, prestop_seconds: Optional[float] = None):
+        """
+        Flip /ready ke 503 begitu SIGTERM/SIGINT diterima. Untuk SIGTERM, handler uvicorn
+        (dipasang sebelum lifespan, berhenti menerima koneksi lalu drain) baru dipanggil setelah
+        `prestop_seconds`, agar load balancer sempat melihat 503 dan melepas worker ini.
+        SIGINT (Ctrl+C) dan signal kedua diteruskan langsung.
+        """
+        # Signal hanya bisa dipasang dari main thread (TestClient menjalankan lifespan di thread lain)
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+        if prestop_seconds is None:
+            prestop_seconds = settings.shutdown_prestop_seconds
+        previous = {}
+        pending: List[threading.Timer] = []
+
+        def forward(sig, frame):
+            original = previous.get(sig)
+            if callable(original):
+                original(sig, frame)
+            else:
+                # SIG_DFL/SIG_IGN: kembalikan perilaku asli lalu kirim ulang signal-nya
+                signal.signal(sig, original)
+                signal.raise_signal(sig)
+
+        def handler(sig, frame):
+            self.mark_shutting_down()
+            if sig != signal.SIGTERM or prestop_seconds <= 0 or pending:
+                for timer in pending:
+                    timer.cancel()
+                forward(sig, frame)
+                return
+            logger.info(f"SIGTERM received; not ready, stopping in {prestop_seconds}s")
+            timer = threading.Timer(prestop_seconds, forward, args=(sig, None))
+            timer.daemon = True
+            pending.append(timer)
+            timer.start()
+
+        for sig in SHUTDOWN_SIGNALS:
+            previous[sig] = signal.signal(sig, handler)
+        try:
+            yield
+        finally:
+            for timer in pending:
+                timer.cancel()
+            for sig, original in previous.items():
+                signal.signal(sig, original)
+
+    def to_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "shutting_down": self.shutting_down,
+            "started_at": self.started_at,
+            "checks": self.checks,
+        }
+
+
+readiness = Readiness()
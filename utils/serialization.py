@@ -0,0 +1,40 @@
+from typing import Dict, List, Optional, Type
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from settings import settings
+
+
+class ListPageEncoder:
+    """
+    Encoder JSON untuk response list `{"data": [...], "pagination_info": {...}}`.
+    TypeAdapter dibuat sekali saat import (controller dimuat di lifespan), bukan per request.
+
+    Mode trusted: dokumen yang ditulis API sendiri dibungkus lewat model_construct tanpa validasi;
+    field yang tidak ada di model (password, is_deleted, ...) tetap tidak ikut ter-serialize.
+    Di pydantic 2.x validasi (Rust) justru lebih cepat dari model_construct (Python per row), jadi
+    default-nya off; trusted berguna untuk data lama yang tidak lolos validasi (mis. created_at string).
+    """
+
+    def __init__(self, page_model: Type[BaseModel], item_model: Type[BaseModel], info_model: Type[BaseModel]):
+        self.page_model = page_model
+        self.item_model = item_model
+        self.info_model = info_model
+        self.adapter = TypeAdapter(page_model)
+
+    def encode(self, items: List[dict], pagination_info: Dict[str, int], trusted: Optional[bool] = None) -> bytes:
+        if trusted is None:
+            trusted = settings.trusted_db_serialization
+        if trusted:
+            construct = self.item_model.model_construct
+            page = self.page_model.model_construct(
+                data=[construct(**item) for item in items],
+                pagination_info=self.info_model.model_construct(**pagination_info),
+            )
+            # warnings=False: tipe lama di DB (mis. created_at string) di-serialize apa adanya
+            return self.adapter.dump_json(page, by_alias=True, warnings=False)
+        page = self.adapter.validate_python({"data": items, "pagination_info": pagination_info})
+        return self.adapter.dump_json(page, by_alias=True)
+
+    def response(self, items: List[dict], pagination_info: Dict[str, int], trusted: Optional[bool] = None) -> Response:
+        # Response langsung: FastAPI tidak memvalidasi ulang terhadap response_model
+        return Response(content=self.encode(items, pagination_info, trusted), media_type="application/json")
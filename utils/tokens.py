@@ -0,0 +1,18 @@
+from typing import Optional
+from jose import jwt, JWTError
+from settings import settings
+
+# Dipisah dari utils.auth agar middleware bisa membaca token tanpa meng-import passlib/pymongo
+JWT_SECRET = settings.jwt_secret_key or "dev-secret-change-me"
+JWT_ALG = settings.jwt_algorithm
+ACCESS_EXPIRE_MINUTES = int(settings.access_token_expire_minutes)
+
+
+def token_subject(authorization: Optional[str]) -> Optional[str]:
+    # Ambil `sub` dari header Authorization tanpa query DB (untuk middleware)
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.decode(authorization[7:], JWT_SECRET, algorithms=[JWT_ALG]).get("sub")
+    except JWTError:
+        return None